@@ -0,0 +1,232 @@
+"""
+Armazenamento de auditoria das predicoes (append-only).
+
+Cada predicao (usuario, trace_id, features, classe, probabilidades) eh
+registrada para analise posterior, sem depender dos logs JSON.
+
+Fluxo:
+1. Endpoint chama prediction_store.record(...) -> so coloca num buffer em memoria
+2. Uma thread em background drena o buffer em lotes grandes
+3. Cada lote eh gravado numa unica transacao SQLite (modo WAL)
+
+A latencia da requisicao nunca depende de disco: se o buffer encher,
+o registro eh descartado e contado na metrica de descartes.
+
+Com varios workers (app/server.py) cada processo tem seu proprio escritor,
+entao cada um grava no proprio arquivo (AUDIT_DB_PATH com o pid no nome:
+audit/predictions-<pid>.db). Assim nenhum worker rotaciona o arquivo que
+outro ainda esta usando.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.core import logger
+from app.metrics import AUDIT_RECORDS_DROPPED, AUDIT_RECORDS_WRITTEN
+
+
+# =============================================================================
+# CONFIGURACOES
+# =============================================================================
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "true").lower() == "true"
+AUDIT_DB_PATH = Path(os.getenv("AUDIT_DB_PATH", "audit/predictions.db"))
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+AUDIT_MAX_BYTES = int(os.getenv("AUDIT_MAX_BYTES", str(100 * 1024 * 1024)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    user TEXT NOT NULL,
+    trace_id TEXT,
+    sepal_length REAL NOT NULL,
+    sepal_width REAL NOT NULL,
+    petal_length REAL NOT NULL,
+    petal_width REAL NOT NULL,
+    classe TEXT NOT NULL,
+    probabilidades TEXT NOT NULL
+)
+"""
+
+INSERT = """
+INSERT INTO predictions (
+    timestamp, user, trace_id,
+    sepal_length, sepal_width, petal_length, petal_width,
+    classe, probabilidades
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class PredictionStore:
+    """
+    Buffer limitado + escritor em background para o SQLite de auditoria.
+
+    Exemplo de uso:
+        prediction_store.record(user="admin", trace_id="a1b2c3d4",
+                                features=[5.1, 3.5, 1.4, 0.2],
+                                classe="setosa", probabilidades={...})
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        enabled: bool,
+        buffer_size: int,
+        batch_size: int,
+        flush_interval: float,
+        max_bytes: int,
+    ):
+        self.path = path
+        self.file = None
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self._buffer = queue.Queue(maxsize=buffer_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+
+    # -------------------------------------------------------------------------
+    # Lado da requisicao (nunca bloqueia)
+    # -------------------------------------------------------------------------
+    def record(self, user: str, trace_id: str, features, classe: str, probabilidades: dict):
+        """Enfileira uma predicao; descarta (e conta) se o buffer estiver cheio."""
+        if not self.enabled:
+            return
+        row = (
+            datetime.utcnow().isoformat() + "Z",
+            user,
+            trace_id,
+            *(float(x) for x in features),
+            classe,
+            json.dumps(probabilidades),
+        )
+        try:
+            self._buffer.put_nowait(row)
+        except queue.Full:
+            AUDIT_RECORDS_DROPPED.inc()
+
+    # -------------------------------------------------------------------------
+    # Ciclo de vida (chamado no startup/shutdown da aplicacao)
+    # -------------------------------------------------------------------------
+    def start(self):
+        """Inicia a thread escritora."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="prediction-audit-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Para a thread escritora gravando o que restou no buffer."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    # -------------------------------------------------------------------------
+    # Thread escritora
+    # -------------------------------------------------------------------------
+    def _run(self):
+        # Resolvido aqui (e nao no __init__): o store eh criado no processo pai
+        # antes do fork, mas o escritor roda em cada worker
+        self.file = self.path.with_name(f"{self.path.stem}-{os.getpid()}{self.path.suffix}")
+        try:
+            self._open()
+        except (sqlite3.Error, OSError) as exc:
+            logger.error("audit_store_unavailable", extra={"error": str(exc)})
+            return
+
+        while not self._stop.is_set():
+            self._flush(self._drain(timeout=self.flush_interval))
+
+        # Shutdown: grava tudo o que ainda estiver no buffer
+        while not self._buffer.empty():
+            self._flush(self._drain(timeout=0))
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _drain(self, timeout: float) -> list:
+        """Espera o primeiro registro e coleta ate batch_size sem bloquear."""
+        rows = []
+        try:
+            if timeout:
+                rows.append(self._buffer.get(timeout=timeout))
+            while len(rows) < self.batch_size:
+                rows.append(self._buffer.get_nowait())
+        except queue.Empty:
+            pass
+        return rows
+
+    def _flush(self, rows: list):
+        # Erros de disco (OSError) tambem nao podem matar a thread escritora:
+        # sem ela o buffer enche e todo registro passa a ser descartado
+        if not rows:
+            return
+        try:
+            if self._conn is None:
+                self._open()
+            with self._conn:
+                self._conn.executemany(INSERT, rows)
+        except (sqlite3.Error, OSError) as exc:
+            AUDIT_RECORDS_DROPPED.inc(len(rows))
+            logger.error(
+                "audit_flush_failed", extra={"error": str(exc), "records": len(rows)}
+            )
+            return
+        AUDIT_RECORDS_WRITTEN.inc(len(rows))
+
+        try:
+            self._rotate_if_needed()
+        except (sqlite3.Error, OSError) as exc:
+            logger.error("audit_rotate_failed", extra={"error": str(exc)})
+
+    def _open(self):
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+    def _rotate_if_needed(self):
+        """Quando o arquivo passa de max_bytes, arquiva e comeca um novo."""
+        if self.file.stat().st_size < self.max_bytes:
+            return
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._conn.close()
+        # Se algo falhar daqui em diante, o proximo _flush reabre o arquivo
+        self._conn = None
+        suffix = time.strftime("%Y%m%dT%H%M%S")
+        rotated = self.file.with_name(f"{self.file.stem}-{suffix}{self.file.suffix}")
+        # Duas rotacoes no mesmo segundo: rename sobrescreveria o arquivo anterior
+        n = 1
+        while rotated.exists():
+            rotated = self.file.with_name(f"{self.file.stem}-{suffix}-{n}{self.file.suffix}")
+            n += 1
+        self.file.rename(rotated)
+        logger.info("audit_store_rotated", extra={"path": str(rotated)})
+        self._open()
+
+
+prediction_store = PredictionStore(
+    path=AUDIT_DB_PATH,
+    enabled=AUDIT_ENABLED,
+    buffer_size=AUDIT_BUFFER_SIZE,
+    batch_size=AUDIT_BATCH_SIZE,
+    flush_interval=AUDIT_FLUSH_INTERVAL,
+    max_bytes=AUDIT_MAX_BYTES,
+)
@@ -3,12 +3,17 @@ Modulo de Autenticacao JWT
 Funcoes para criar e validar tokens JWT
 """
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 import jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from app.tracing import span
+
 
 # =============================================================================
 # CONFIGURACOES
@@ -16,6 +21,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 SECRET_KEY = os.getenv("JWT_SECRET", "dev-secret-change-in-production")
 ALGORITHM = "HS256"
 TOKEN_EXPIRE_MINUTES = int(os.getenv("TOKEN_EXPIRE_MINUTES", "30"))
+# Tokens ja validados (evita jwt.decode completo a cada chamada; 0 = desliga)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
 
 # Usuarios (em producao, use banco de dados!)
 USERS_DB = {
@@ -29,6 +36,32 @@ USERS_DB = {
 # =============================================================================
 security = HTTPBearer()
 
+# token -> (usuario, exp em epoch). LRU limitado a TOKEN_CACHE_SIZE
+_token_cache = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+def _cached_user(token: str) -> dict | None:
+    with _token_cache_lock:
+        entry = _token_cache.get(token)
+        if entry is None:
+            return None
+        user, exp = entry
+        if exp <= time.time():
+            del _token_cache[token]
+            return None
+        _token_cache.move_to_end(token)
+        return user
+
+
+def _cache_user(token: str, user: dict, exp: float):
+    if TOKEN_CACHE_SIZE <= 0:
+        return
+    with _token_cache_lock:
+        _token_cache[token] = (user, exp)
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
 
 def create_token(username: str, role: str) -> str:
     """Cria um token JWT com expiracao."""
@@ -37,16 +70,38 @@ def create_token(username: str, role: str) -> str:
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
-    """Valida o token JWT e retorna o usuario."""
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """
+    Valida o token JWT e retorna o usuario.
+
+    async: roda direto no event loop (jwt.decode custa microssegundos e o
+    cache evita ate isso), sem ocupar uma thread do threadpool por requisicao.
+    """
     token = credentials.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return {"username": payload["sub"], "role": payload["role"]}
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expirado")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Token invalido")
+    with span("auth"):
+        # Token identico a um ja validado: a assinatura nao muda, so a expiracao
+        user = _cached_user(token)
+        if user is not None:
+            return dict(user)
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            user = {"username": payload["sub"], "role": payload["role"]}
+            # Sem exp o token nao expira: nao entra no cache (so tokens com prazo)
+            if payload.get("exp") is not None:
+                _cache_user(token, user, payload["exp"])
+            return dict(user)
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token expirado")
+        except (jwt.InvalidTokenError, KeyError):
+            # KeyError: assinatura valida mas sem sub/role
+            raise HTTPException(status_code=401, detail="Token invalido")
+
+
+async def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
+    """Como get_current_user, mas exige role admin."""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Acesso restrito a administradores")
+    return current_user
 
 
 def authenticate_user(username: str, password: str) -> dict | None:
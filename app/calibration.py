@@ -0,0 +1,155 @@
+"""
+Calibracao de latencia do modelo no carregamento.
+
+O melhor tamanho de lote e o melhor paralelismo dependem do estimador que
+esta no .pkl (arvore unica, floresta com 500 arvores, tabela de regioes...).
+Em vez de chutar constantes, medimos:
+
+- custo por chamada e por linha para varios tamanhos de lote (1 thread)
+- vazao (linhas/s) com varias threads chamando a inferencia ao mesmo tempo
+
+A curva fica disponivel em /model/info e gera duas recomendacoes:
+- chunk_rows: menor lote cujo custo por linha fica a 10% do melhor
+  (lotes maiores nao barateiam a linha, so atrasam a divisao em pedacos)
+- parallelism: numero de threads com maior vazao (1 se nao escalar)
+
+Com orcamento curto demais a recomendacao pode ficar None (nao medida):
+o model_loader usa o default nesse caso.
+"""
+import threading
+import time
+
+import numpy as np
+
+from app.core import logger
+from app.cpus import available_cpus
+
+
+# =============================================================================
+# CONFIGURACOES
+# =============================================================================
+CALIBRATION_BATCH_SIZES = [1, 8, 32, 128, 512, 2048]
+CALIBRATION_REPEATS = 5
+# Tolerancia para considerar um lote "tao bom quanto o melhor"
+CHUNK_TOLERANCE = 1.10
+# Ganho minimo de vazao para justificar mais threads
+MIN_PARALLEL_SPEEDUP = 1.2
+
+
+def _thread_counts() -> list:
+    cpus = available_cpus()
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    return counts
+
+
+def _time_call(score, features: np.ndarray, repeats: int) -> float:
+    """Melhor tempo (s) de `repeats` chamadas (o minimo filtra ruido)."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        score(features)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _throughput(score, features: np.ndarray, threads: int, repeats: int) -> float:
+    """Linhas/s com `threads` threads chamando score em paralelo."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(repeats):
+            score(features)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return threads * repeats * len(features) / elapsed
+
+
+def calibrate(score, n_features: int, budget_s: float, seed: int = 0) -> dict:
+    """
+    Mede a curva de custo de `score(features)` dentro do orcamento de tempo.
+
+    Returns:
+        {"batch_curve": [...], "thread_curve": [...],
+         "chunk_rows": N ou None, "parallelism": N ou None, "duration_ms": ...}
+    """
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    deadline = start + budget_s
+
+    # Aquecimento (caches, imports preguicosos do sklearn)
+    score(rng.uniform(0, 10, size=(8, n_features)))
+
+    # O primeiro tamanho eh sempre medido, mesmo com o orcamento estourado
+    # no aquecimento (modelo lento ou orcamento 0): sem ele nao ha chunk_rows
+    batch_curve = []
+    for batch_size in CALIBRATION_BATCH_SIZES:
+        if batch_curve and time.perf_counter() > deadline:
+            break
+        features = rng.uniform(0, 10, size=(batch_size, n_features))
+        call_s = _time_call(score, features, CALIBRATION_REPEATS)
+        batch_curve.append(
+            {
+                "batch_size": batch_size,
+                "call_ms": round(call_s * 1000, 4),
+                "row_us": round(call_s * 1e6 / batch_size, 4),
+            }
+        )
+
+    # Um ponto so (lote de 1) nao mostra a curva: recomendar 1 linha por
+    # pedaco dividiria todo lote em pedacos de 1 linha
+    chunk_rows = None
+    if len(batch_curve) >= 2:
+        best_row = min(p["row_us"] for p in batch_curve)
+        chunk_rows = next(
+            p["batch_size"] for p in batch_curve if p["row_us"] <= best_row * CHUNK_TOLERANCE
+        )
+
+    thread_curve = []
+    features = rng.uniform(0, 10, size=(chunk_rows or batch_curve[-1]["batch_size"], n_features))
+    for threads in _thread_counts():
+        if time.perf_counter() > deadline:
+            break
+        thread_curve.append(
+            {
+                "threads": threads,
+                "rows_per_s": round(_throughput(score, features, threads, CALIBRATION_REPEATS), 1),
+            }
+        )
+
+    # Com menos de 2 pontos nao da para dizer se escala: deixa para o default
+    parallelism = None
+    if len(thread_curve) >= 2:
+        base = thread_curve[0]["rows_per_s"]
+        best = max(thread_curve, key=lambda p: p["rows_per_s"])
+        parallelism = 1
+        if base and best["rows_per_s"] >= base * MIN_PARALLEL_SPEEDUP:
+            parallelism = best["threads"]
+    elif len(_thread_counts()) == 1:
+        parallelism = 1  # uma unica CPU: nao ha o que medir
+
+    result = {
+        "batch_curve": batch_curve,
+        "thread_curve": thread_curve,
+        "chunk_rows": chunk_rows,
+        "parallelism": parallelism,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    logger.info(
+        "model_calibrated",
+        extra={
+            "chunk_rows": chunk_rows,
+            "parallelism": parallelism,
+            "duration_ms": result["duration_ms"],
+        },
+    )
+    return result
@@ -0,0 +1,51 @@
+"""
+Deteccao das CPUs realmente disponiveis para o processo.
+
+os.cpu_count() devolve os cores da maquina, nao o limite do container:
+num host de 64 cores com limite de 2 CPUs, dimensionar pools por ele
+cria dezenas de threads disputando 2 CPUs.
+"""
+import math
+import os
+from pathlib import Path
+
+
+def available_cpus() -> int:
+    """
+    CPUs que o processo pode realmente usar.
+
+    Considera (o menor valor vence):
+    - afinidade do processo (taskset / cpuset)
+    - quota de CPU do cgroup v2 (cpu.max) ou v1 (cpu.cfs_quota_us)
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return max(1, cpus)
+
+
+def _cgroup_cpu_quota() -> float | None:
+    # cgroup v2: "max 100000" ou "200000 100000"
+    cpu_max = Path("/sys/fs/cgroup/cpu.max")
+    try:
+        quota, period = cpu_max.read_text().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+
+    # cgroup v1
+    try:
+        quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
@@ -0,0 +1,165 @@
+"""
+Tabela de regioes de decisao para modelos de arvore.
+
+Uma arvore (ou floresta) so muda de resposta nos limiares de split:
+    vai para a esquerda se x[f] <= limiar
+
+Como cada feature eh limitada a 0-10 pelo IrisRequest, os limiares de cada
+feature dividem o espaco de entrada numa grade de celulas. Dentro de uma
+celula TODAS as comparacoes dao o mesmo resultado, entao a probabilidade
+eh constante. Basta calcular predict_proba uma vez por celula (no load)
+e, na requisicao:
+
+    celula[f] = searchsorted(limiares[f], x[f])   # vetorizado
+    probs     = tabela[indice_plano(celulas)]      # gather O(1) por linha
+
+O resultado eh exato (mesmo float64 de predict_proba). Se a tabela passar do
+limite de memoria, o modelo nao for de arvore ou a verificacao de
+equivalencia falhar, o loader volta para predict_proba normal.
+"""
+import numpy as np
+
+from app.core import logger
+
+
+# Mesmos limites de IrisRequest (ge=0, le=10)
+FEATURE_MIN = 0.0
+FEATURE_MAX = 10.0
+
+# Linhas por chamada de predict_proba durante a construcao
+BUILD_CHUNK_ROWS = 65536
+
+
+def _trees(modelo) -> list | None:
+    """Arvores do modelo (DecisionTree, RandomForest, ExtraTrees...) ou None."""
+    if hasattr(modelo, "tree_"):
+        return [modelo]
+    estimators = getattr(modelo, "estimators_", None)
+    if estimators is None:
+        return None
+    trees = list(np.ravel(estimators))
+    if not trees or not all(hasattr(t, "tree_") for t in trees):
+        return None
+    return trees
+
+
+def _cell_representatives(thresholds: np.ndarray) -> np.ndarray:
+    """
+    Um valor float32 dentro de cada celula (limiar[i-1], limiar[i]].
+
+    sklearn converte X para float32 antes de comparar com o limiar (float64),
+    entao o representante precisa ser um float32 que caia na mesma celula.
+    """
+    reps = []
+    for t in thresholds:
+        r = np.float32(t)
+        if r > t:
+            r = np.nextafter(r, np.float32(-np.inf))
+        reps.append(r)
+    # Ultima celula: acima do maior limiar
+    last = np.float32(thresholds[-1]) if len(thresholds) else np.float32(FEATURE_MAX)
+    if len(thresholds) and last <= thresholds[-1]:
+        last = np.nextafter(last, np.float32(np.inf))
+    reps.append(last)
+    return np.array(reps, dtype=np.float32).astype(np.float64)
+
+
+class DecisionLookupTable:
+    """
+    Probabilidades pre-calculadas por celula da grade de limiares.
+
+    Exemplo de uso:
+        tabela = DecisionLookupTable.build(modelo, max_bytes=64 * 1024**2)
+        if tabela is not None:
+            probs = tabela.predict_proba(features)
+    """
+
+    def __init__(self, thresholds: list, table: np.ndarray):
+        self.thresholds = thresholds
+        self.shape = tuple(len(t) + 1 for t in thresholds)
+        self.table = table
+        # Passo de cada feature no indice plano (ordem C, igual a ravel_multi_index)
+        self.strides = np.array(
+            [int(np.prod(self.shape[i + 1:])) for i in range(len(self.shape))],
+            dtype=np.int64,
+        )
+
+    @property
+    def n_cells(self) -> int:
+        return len(self.table)
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+    def cells(self, features: np.ndarray) -> np.ndarray:
+        """Indice plano da celula de cada linha (features ja validadas em 0-10)."""
+        x = np.asarray(features, dtype=np.float32)
+        flat = np.zeros(len(x), dtype=np.int64)
+        for f, t in enumerate(self.thresholds):
+            flat += np.searchsorted(t, x[:, f], side="left") * self.strides[f]
+        return flat
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        return self.table[self.cells(features)]
+
+    @classmethod
+    def build(cls, modelo, max_bytes: int):
+        """Constroi a tabela ou retorna None (modelo nao suportado / grande demais)."""
+        trees = _trees(modelo)
+        if trees is None:
+            logger.info("lookup_table_skipped", extra={"reason": "not_a_tree_model"})
+            return None
+
+        # Limiares relevantes por feature (fora de [0, 10) nao mudam nada)
+        n_features = modelo.n_features_in_
+        per_feature = [[] for _ in range(n_features)]
+        for tree in trees:
+            split = tree.tree_.feature >= 0
+            for f, t in zip(tree.tree_.feature[split], tree.tree_.threshold[split]):
+                if FEATURE_MIN <= t < FEATURE_MAX:
+                    per_feature[f].append(t)
+        thresholds = [np.unique(np.array(t, dtype=np.float64)) for t in per_feature]
+
+        shape = tuple(len(t) + 1 for t in thresholds)
+        n_cells = int(np.prod(shape))
+        n_classes = len(modelo.classes_)
+        table_bytes = n_cells * n_classes * np.dtype(np.float64).itemsize
+        if table_bytes > max_bytes:
+            logger.info(
+                "lookup_table_skipped",
+                extra={"reason": "memory_cap", "cells": n_cells, "bytes": table_bytes},
+            )
+            return None
+
+        reps = [_cell_representatives(t) for t in thresholds]
+        table = np.empty((n_cells, n_classes), dtype=np.float64)
+        for start in range(0, n_cells, BUILD_CHUNK_ROWS):
+            idx = np.unravel_index(np.arange(start, min(start + BUILD_CHUNK_ROWS, n_cells)), shape)
+            grid = np.column_stack([reps[f][idx[f]] for f in range(n_features)])
+            table[start:start + len(grid)] = modelo.predict_proba(grid)
+
+        lookup = cls(thresholds, table)
+        if not lookup.verify(modelo):
+            logger.warning("lookup_table_skipped", extra={"reason": "verification_failed"})
+            return None
+        return lookup
+
+    def verify(self, modelo, n_samples: int = 5000, seed: int = 0) -> bool:
+        """
+        Teste de equivalencia contra predict_proba.
+
+        Usa pontos aleatorios, os proprios limiares (bordas das celulas) e os
+        extremos 0 e 10. Qualquer diferenca invalida a tabela.
+        """
+        rng = np.random.default_rng(seed)
+        n_features = len(self.thresholds)
+        points = [rng.uniform(FEATURE_MIN, FEATURE_MAX, size=(n_samples, n_features))]
+        for f, t in enumerate(self.thresholds):
+            edges = rng.uniform(FEATURE_MIN, FEATURE_MAX, size=(3 * len(t) + 2, n_features))
+            edges[:, f] = np.concatenate(
+                [t, np.nextafter(t, -np.inf), np.nextafter(t, np.inf), [FEATURE_MIN, FEATURE_MAX]]
+            )
+            points.append(edges)
+        points = np.clip(np.vstack(points), FEATURE_MIN, FEATURE_MAX)
+        return bool(np.array_equal(self.predict_proba(points), modelo.predict_proba(points)))
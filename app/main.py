@@ -14,9 +14,12 @@ from slowapi.errors import RateLimitExceeded
 # Prometheus
 from prometheus_fastapi_instrumentator import Instrumentator
 
+from app.audit import prediction_store
+from app.readiness import saturation_monitor
+from app.tracing import span_exporter
 from app.middleware import LoggingMiddleware
 from app.rate_limit import limiter, rate_limit_exceeded_handler
-from app.routers import auth, info, predict
+from app.routers import admin, auth, info, predict
 from app.core import API_VERSION
 
 
@@ -43,6 +46,7 @@ Versao completa com todas as features do curso:
 - `POST /predict/batch` - Predicao em lote (NOVO!)
 - `GET /metrics` - Metricas Prometheus
 - `GET /health` - Health check
+- `GET /ready` - Readiness (503 quando saturado)
 
 ### Limites de Requisicao (Rate Limiting)
 - `/login`: 10 req/minuto
@@ -55,6 +59,18 @@ Versao completa com todas as features do curso:
     redoc_js_url="https://cdn.jsdelivr.net/npm/redoc@2/bundles/redoc.standalone.js",
 )
 
+# Escritor de auditoria em background (grava o buffer restante no shutdown)
+app.add_event_handler("startup", prediction_store.start)
+app.add_event_handler("shutdown", prediction_store.stop)
+
+# Exportador de spans em background (OTLP/JSON para collector ou arquivo)
+app.add_event_handler("startup", span_exporter.start)
+app.add_event_handler("shutdown", span_exporter.stop)
+
+# Monitor de saturacao (loop lag + canario) usado pelo /ready
+app.add_event_handler("startup", saturation_monitor.start)
+app.add_event_handler("shutdown", saturation_monitor.stop)
+
 # Rate Limiter
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
@@ -81,3 +97,4 @@ Instrumentator().instrument(app).expose(app, endpoint="/metrics")
 app.include_router(info.router)
 app.include_router(auth.router)
 app.include_router(predict.router)
+app.include_router(admin.router)
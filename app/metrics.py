@@ -52,6 +52,35 @@ ERRORS_TOTAL = Counter(
     ['endpoint', 'error_type']
 )
 
+# Registros de auditoria gravados / descartados (buffer cheio ou erro de disco)
+AUDIT_RECORDS_WRITTEN = Counter(
+    'iris_audit_records_written_total',
+    'Total de predicoes gravadas no armazenamento de auditoria'
+)
+
+AUDIT_RECORDS_DROPPED = Counter(
+    'iris_audit_records_dropped_total',
+    'Total de predicoes descartadas pelo armazenamento de auditoria'
+)
+
+# Traces exportados / spans descartados (buffer cheio ou collector fora)
+TRACES_EXPORTED = Counter(
+    'iris_traces_exported_total',
+    'Total de traces exportados'
+)
+
+TRACE_SPANS_DROPPED = Counter(
+    'iris_trace_spans_dropped_total',
+    'Total de spans descartados pelo exportador'
+)
+
+# Inferencias que cairam para o modelo local (model server fora ou com erro)
+MODEL_SERVER_FALLBACKS = Counter(
+    'iris_model_server_fallbacks_total',
+    'Total de inferencias locais por falha do servidor de modelo',
+    ['reason']
+)
+
 # Rate limit excedido
 RATE_LIMIT_EXCEEDED = Counter(
     'rate_limit_exceeded_total',
@@ -81,6 +110,37 @@ BATCH_PREDICTION_LATENCY = Histogram(
     buckets=[0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
 )
 
+# Fracao de linhas duplicadas em cada lote (0 = todas distintas)
+# Ex: lote de 10 com 4 linhas distintas -> 0.6
+BATCH_DEDUP_RATIO = Histogram(
+    'iris_batch_dedup_ratio',
+    'Fracao de linhas duplicadas removidas em cada lote',
+    buckets=[0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+)
+
+# Tempo de espera na fila de inferencia (escalonamento justo por usuario)
+# Permite verificar isolamento: p99 de admin nao deve subir com carga de user
+INFERENCE_QUEUE_WAIT = Histogram(
+    'iris_inference_queue_wait_seconds',
+    'Tempo de espera na fila de inferencia',
+    ['user', 'role'],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+)
+
+# Ida e volta worker -> model server local (Unix socket)
+MODEL_SERVER_IPC_LATENCY = Histogram(
+    'iris_model_server_ipc_latency_seconds',
+    'Latencia de ida e volta ao servidor de modelo local',
+    buckets=[0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1]
+)
+
+# Linhas na chamada ao modelo que atendeu o pedido (preenchimento do lote)
+MODEL_SERVER_BATCH_ROWS = Histogram(
+    'iris_model_server_batch_rows',
+    'Linhas por chamada ao modelo no servidor de modelo',
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096]
+)
+
 # Latencia geral das requisicoes HTTP
 REQUEST_LATENCY = Histogram(
     'http_request_latency_seconds',
@@ -97,12 +157,21 @@ REQUEST_LATENCY = Histogram(
 # =============================================================================
 
 # Modelo carregado? (1 = sim, 0 = nao)
+# Modo multiprocess (varios workers): 0 se QUALQUER processo vivo estiver sem modelo
 MODEL_LOADED = Gauge(
     'model_loaded',
-    'Indica se o modelo esta carregado (1) ou nao (0)'
+    'Indica se o modelo esta carregado (1) ou nao (0)',
+    multiprocess_mode='livemin',
 )
 # Exemplo: MODEL_LOADED.set(1)
 
+# Pedidos aguardando slot de inferencia
+INFERENCE_QUEUE_DEPTH = Gauge(
+    'iris_inference_queue_depth',
+    'Pedidos aguardando slot de inferencia',
+    multiprocess_mode='livesum',
+)
+
 # Confianca media das ultimas predicoes
 AVG_CONFIDENCE = Gauge(
     'prediction_avg_confidence',
@@ -5,14 +5,15 @@ Intercepta todas as requisicoes para logging automatico
 Middleware = codigo que roda ANTES e DEPOIS de cada requisicao
 Permite:
 - Medir tempo de resposta automaticamente
-- Adicionar trace_id para rastreamento
+- Adicionar trace_id para rastreamento (W3C traceparent)
 - Logar todas as requisicoes sem modificar endpoints
 """
 import time
-import uuid
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from app.logging_config import logger
+from app.readiness import saturation_monitor
+from app.tracing import finish_trace, start_trace
 
 
 class LoggingMiddleware(BaseHTTPMiddleware):
@@ -20,32 +21,48 @@ class LoggingMiddleware(BaseHTTPMiddleware):
     Middleware que loga todas as requisicoes automaticamente.
     
     Adiciona a cada requisicao:
-    - trace_id: ID unico (UUID) para rastrear a requisicao em todos os logs
+    - trace_id: ID do trace W3C (32 hex) para rastrear a requisicao em todos os logs.
+      Se o gateway enviar `traceparent`, o mesmo trace_id eh reaproveitado.
     - latency_ms: Tempo de resposta em milissegundos
     - Headers de resposta com trace_id e tempo
     
     Fluxo:
     1. Request chega
-    2. Middleware gera trace_id e marca inicio
+    2. Middleware le/gera o traceparent e marca inicio
     3. Request eh processada pelo endpoint
     4. Middleware calcula latencia e loga
-    5. Response eh retornada com headers extras
+    5. Response eh retornada com headers extras (incluindo traceparent)
     """
     
     async def dispatch(self, request: Request, call_next):
-        # Gera trace_id unico para rastreamento
-        # Permite correlacionar logs da mesma requisicao
-        trace_id = str(uuid.uuid4())[:8]  # Primeiros 8 caracteres do UUID
+        # Continua o trace do gateway (header traceparent) ou inicia um novo
+        # Permite correlacionar logs da mesma requisicao entre servicos
+        trace = start_trace(
+            request.headers.get("traceparent"),
+            f"{request.method} {request.url.path}",
+            {"http.method": request.method, "http.target": request.url.path},
+        )
+        trace_id = trace.trace_id
         request.state.trace_id = trace_id
         
         # Captura tempo inicial
         start_time = time.perf_counter()
         
         # Processa a requisicao (chama o endpoint)
-        response = await call_next(request)
+        # Conta requisicoes em andamento (usado pelo /ready)
+        saturation_monitor.request_started()
+        try:
+            response = await call_next(request)
+        except Exception:
+            # Erros sempre sao exportados (tail sampling)
+            finish_trace(trace, 500, (time.perf_counter() - start_time) * 1000)
+            raise
+        finally:
+            saturation_monitor.request_finished()
         
         # Calcula latencia
         latency_ms = (time.perf_counter() - start_time) * 1000
+        finish_trace(trace, response.status_code, latency_ms)
         
         # Log estruturado da requisicao
         # Nao loga /metrics para evitar poluicao (Prometheus acessa a cada 15s)
@@ -65,6 +82,7 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         # Adiciona headers de rastreamento na resposta
         # Uteis para debug do cliente
         response.headers["X-Trace-ID"] = trace_id
+        response.headers["traceparent"] = trace.traceparent
         response.headers["X-Response-Time-Ms"] = str(round(latency_ms, 2))
         
         return response
@@ -0,0 +1,173 @@
+"""
+Cliente do servidor de modelo local (ver model_server.py).
+
+Quando MODEL_SERVER_SOCKET esta definido, os workers da API enviam as linhas
+para o servidor de modelo em vez de rodar o modelo no proprio processo.
+Se o servidor estiver fora do ar (ou responder com erro), a inferencia cai
+para o modelo local e o servidor so eh tentado de novo depois de
+MODEL_SERVER_RETRY_S segundos.
+
+A interface eh a mesma de model_loader.predict_with_proba.
+"""
+import itertools
+import os
+import queue
+import socket
+import threading
+import time
+
+import numpy as np
+
+from app.core import logger
+from app.metrics import (
+    MODEL_SERVER_BATCH_ROWS,
+    MODEL_SERVER_FALLBACKS,
+    MODEL_SERVER_IPC_LATENCY,
+)
+from app.model_loader import predict_with_proba as local_predict_with_proba
+from app.model_server import (
+    MAGIC,
+    MODEL_SERVER_SOCKET,
+    REQUEST_HEADER,
+    RESPONSE_HEADER,
+    STATUS_OK,
+    VERSION,
+)
+
+
+# =============================================================================
+# CONFIGURACOES
+# =============================================================================
+MODEL_SERVER_TIMEOUT_MS = float(os.getenv("MODEL_SERVER_TIMEOUT_MS", "1000"))
+MODEL_SERVER_RETRY_S = float(os.getenv("MODEL_SERVER_RETRY_S", "5"))
+
+
+class ModelServerError(Exception):
+    """Resposta invalida ou com erro do servidor de modelo."""
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("model server fechou a conexao")
+        received += n
+    return bytes(buf)
+
+
+class ModelServerClient:
+    """
+    Pool de conexoes bloqueantes (uma por thread em uso) ao model server.
+
+    Exemplo de uso:
+        pred, probs = model_server_client.predict_with_proba(features)
+    """
+
+    def __init__(self, path: str, timeout_ms: float, retry_s: float):
+        self.path = path
+        self.timeout = timeout_ms / 1000
+        self.retry_s = retry_s
+        self._pool = queue.LifoQueue()
+        self._ids = itertools.count(1)
+        self._ids_lock = threading.Lock()
+        self._down_until = 0.0
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        return sock
+
+    def _call(self, features: np.ndarray):
+        try:
+            sock = self._pool.get_nowait()
+        except queue.Empty:
+            return self._call_on(self._connect(), features)
+
+        try:
+            return self._call_on(sock, features)
+        except TimeoutError:
+            raise  # servidor lento, nao conexao velha: nao dobra a espera
+        except OSError:
+            # Conexao do pool ficou velha (ex: model server reiniciou). As
+            # demais do pool tambem: descarta todas e tenta uma vez numa nova
+            self._clear_pool()
+            return self._call_on(self._connect(), features)
+
+    def _clear_pool(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _call_on(self, sock: socket.socket, features: np.ndarray):
+        """Um pedido na conexao dada; devolve a conexao ao pool se der certo."""
+        with self._ids_lock:
+            request_id = next(self._ids) & 0xFFFFFFFF
+        n_rows, n_features = features.shape
+        try:
+            sock.sendall(
+                REQUEST_HEADER.pack(MAGIC, VERSION, request_id, n_rows, n_features)
+                + np.ascontiguousarray(features, dtype="<f8").tobytes()
+            )
+            header = _recv_exactly(sock, RESPONSE_HEADER.size)
+            magic, version, resp_id, resp_rows, n_classes, status, batch_rows = (
+                RESPONSE_HEADER.unpack(header)
+            )
+            if magic != MAGIC or version != VERSION or resp_id != request_id:
+                raise ModelServerError("resposta fora do protocolo")
+            if status != STATUS_OK or resp_rows != n_rows:
+                raise ModelServerError(f"status {status}")
+            pred = np.frombuffer(_recv_exactly(sock, n_rows * 8), dtype="<i8")
+            probs = np.frombuffer(
+                _recv_exactly(sock, n_rows * n_classes * 8), dtype="<f8"
+            ).reshape(n_rows, n_classes)
+        except BaseException:
+            sock.close()
+            raise
+        self._pool.put(sock)
+        return pred, probs, batch_rows
+
+    def predict_with_proba(self, features: np.ndarray):
+        """Inferencia via model server, com fallback para o modelo local."""
+        if time.monotonic() < self._down_until:
+            MODEL_SERVER_FALLBACKS.labels(reason="server_down").inc()
+            return local_predict_with_proba(features)
+
+        start = time.perf_counter()
+        try:
+            pred, probs, batch_rows = self._call(features)
+        except (OSError, ModelServerError) as exc:
+            reason = "error" if isinstance(exc, ModelServerError) else "unreachable"
+            MODEL_SERVER_FALLBACKS.labels(reason=reason).inc()
+            self._down_until = time.monotonic() + self.retry_s
+            logger.warning(
+                "model_server_fallback", extra={"reason": reason, "error": str(exc)}
+            )
+            return local_predict_with_proba(features)
+
+        MODEL_SERVER_IPC_LATENCY.observe(time.perf_counter() - start)
+        MODEL_SERVER_BATCH_ROWS.observe(batch_rows)
+        return pred, probs
+
+
+model_server_client = (
+    ModelServerClient(MODEL_SERVER_SOCKET, MODEL_SERVER_TIMEOUT_MS, MODEL_SERVER_RETRY_S)
+    if MODEL_SERVER_SOCKET
+    else None
+)
+
+
+def predict_with_proba(features: np.ndarray):
+    """
+    Mesma interface de model_loader.predict_with_proba.
+
+    Usa o model server quando MODEL_SERVER_SOCKET esta definido.
+    """
+    if model_server_client is not None:
+        return model_server_client.predict_with_proba(features)
+    return local_predict_with_proba(features)
@@ -4,13 +4,35 @@ Carregamento do modelo Iris.
 Separado do main.py para evitar efeitos colaterais em rotas e facilitar testes.
 O carregamento acontece na importacao do modulo.
 """
+import math
+import os
 import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
+
+from app.calibration import calibrate
 from app.core import logger
+from app.cpus import available_cpus
+from app.lookup_table import DecisionLookupTable
 from app.metrics import MODEL_LOADED
 
 
+# Tabela de regioes de decisao (apenas modelos de arvore, ver lookup_table.py)
+MODEL_LOOKUP_TABLE = os.getenv("MODEL_LOOKUP_TABLE", "true").lower() == "true"
+MODEL_LOOKUP_MAX_MB = int(os.getenv("MODEL_LOOKUP_MAX_MB", "64"))
+
+# Calibracao de latencia no load (ver calibration.py)
+MODEL_CALIBRATION = os.getenv("MODEL_CALIBRATION", "false").lower() == "true"
+MODEL_CALIBRATION_BUDGET_S = float(os.getenv("MODEL_CALIBRATION_BUDGET_S", "5"))
+
+# Usados quando a calibracao esta desligada
+DEFAULT_CHUNK_ROWS = 1024
+DEFAULT_PARALLELISM = available_cpus()
+
+
 BASE_DIR = Path(__file__).resolve().parent
 
 MODEL_PATHS = [
@@ -44,3 +66,107 @@ if not MODELO_OK:
         "model_not_found",
         extra={"searched_paths": [str(p) for p in MODEL_PATHS]},
     )
+
+lookup_table = None
+if MODELO_OK and MODEL_LOOKUP_TABLE:
+    start = time.perf_counter()
+    lookup_table = DecisionLookupTable.build(
+        modelo, max_bytes=MODEL_LOOKUP_MAX_MB * 1024 * 1024
+    )
+    if lookup_table is not None:
+        logger.info(
+            "lookup_table_built",
+            extra={
+                "cells": lookup_table.n_cells,
+                "mb": round(lookup_table.nbytes / 1024 / 1024, 2),
+                "build_ms": round((time.perf_counter() - start) * 1000, 1),
+            },
+        )
+
+
+def _score(features: np.ndarray):
+    """Inferencia de um pedaco (tabela de regioes ou modelo)."""
+    if lookup_table is not None:
+        probs = lookup_table.predict_proba(features)
+        return modelo.classes_.take(np.argmax(probs, axis=1)), probs
+    return modelo.predict(features), modelo.predict_proba(features)
+
+
+calibration = None
+if MODELO_OK and MODEL_CALIBRATION:
+    calibration = calibrate(
+        _score, n_features=modelo.n_features_in_, budget_s=MODEL_CALIBRATION_BUDGET_S
+    )
+
+# Parametros de inferencia: env > calibracao > default
+INFERENCE_CHUNK_ROWS = int(
+    os.getenv(
+        "INFERENCE_CHUNK_ROWS",
+        str((calibration or {}).get("chunk_rows") or DEFAULT_CHUNK_ROWS),
+    )
+)
+INFERENCE_PARALLELISM = int(
+    os.getenv(
+        "INFERENCE_PARALLELISM",
+        str((calibration or {}).get("parallelism") or DEFAULT_PARALLELISM),
+    )
+)
+
+# Paralelismo dentro de uma requisicao (lotes grandes)
+# - acima de INFERENCE_PARALLEL_MIN_ROWS linhas o lote eh dividido em partes
+# - cada requisicao usa no maximo INFERENCE_MAX_PARALLEL_PER_REQUEST threads,
+#   para um unico cliente nao monopolizar o host
+INFERENCE_PARALLEL_MIN_ROWS = int(
+    os.getenv("INFERENCE_PARALLEL_MIN_ROWS", str(2 * INFERENCE_CHUNK_ROWS))
+)
+INFERENCE_MAX_PARALLEL_PER_REQUEST = int(
+    os.getenv("INFERENCE_MAX_PARALLEL_PER_REQUEST", str(max(1, INFERENCE_PARALLELISM // 2)))
+)
+
+# Pool compartilhado (limite global de threads de inferencia paralela)
+_inference_pool = ThreadPoolExecutor(
+    max_workers=max(1, INFERENCE_PARALLELISM), thread_name_prefix="inference"
+)
+
+
+def _score_chunked(features: np.ndarray):
+    """Inferencia sequencial em pedacos de INFERENCE_CHUNK_ROWS linhas."""
+    if len(features) <= INFERENCE_CHUNK_ROWS:
+        return _score(features)
+    return _concat(
+        [
+            _score(features[i:i + INFERENCE_CHUNK_ROWS])
+            for i in range(0, len(features), INFERENCE_CHUNK_ROWS)
+        ]
+    )
+
+
+def _concat(parts: list):
+    return (
+        np.concatenate([pred for pred, _ in parts]),
+        np.concatenate([probs for _, probs in parts]),
+    )
+
+
+def predict_with_proba(features: np.ndarray, max_parallel: int | None = None):
+    """
+    Retorna (indices_preditos, probabilidades) para cada linha.
+
+    Usa a tabela de regioes quando disponivel (mesmo resultado de
+    modelo.predict/predict_proba, sem percorrer as arvores).
+    Lotes maiores que INFERENCE_CHUNK_ROWS sao processados em pedacos;
+    acima de INFERENCE_PARALLEL_MIN_ROWS os pedacos rodam em paralelo
+    (NumPy/sklearn liberam o GIL) e sao remontados na ordem original.
+    """
+    if max_parallel is None:
+        max_parallel = INFERENCE_MAX_PARALLEL_PER_REQUEST
+    n_rows = len(features)
+    n_parts = min(max_parallel, math.ceil(n_rows / INFERENCE_CHUNK_ROWS))
+    if n_rows < INFERENCE_PARALLEL_MIN_ROWS or n_parts <= 1:
+        return _score_chunked(features)
+
+    futures = [
+        _inference_pool.submit(_score_chunked, part)
+        for part in np.array_split(features, n_parts)
+    ]
+    return _concat([f.result() for f in futures])
@@ -0,0 +1,217 @@
+"""
+Servidor de modelo local (um processo por host).
+
+Com varios workers uvicorn, cada um tem seu proprio modelo e so consegue
+agrupar as proprias requisicoes. Aqui os workers enviam as linhas por um
+Unix domain socket para UM processo que possui o modelo e agrupa as linhas
+de TODOS os workers numa unica chamada de inferencia.
+
+Formato binario (little-endian, sem JSON):
+
+    Request:  magic "IR" | versao u8 | request_id u32 | n_rows u32 | n_features u16
+              + n_rows * n_features float64
+    Response: magic "IR" | versao u8 | request_id u32 | n_rows u32 | n_classes u16
+              | status u8 | batch_rows u32
+              + n_rows int64 (indices preditos)
+              + n_rows * n_classes float64 (probabilidades)
+
+batch_rows = total de linhas na chamada ao modelo que atendeu o pedido
+(permite medir o preenchimento dos lotes do lado do worker).
+
+Uso:
+    MODEL_SERVER_SOCKET=/tmp/iris-model.sock python -m app.model_server
+"""
+import asyncio
+import os
+import signal
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.core import logger
+
+
+# =============================================================================
+# PROTOCOLO
+# =============================================================================
+MAGIC = b"IR"
+VERSION = 1
+REQUEST_HEADER = struct.Struct("<2sBIIH")
+RESPONSE_HEADER = struct.Struct("<2sBIIHBI")
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# =============================================================================
+# CONFIGURACOES
+# =============================================================================
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET", "")
+MODEL_SERVER_MAX_BATCH = int(os.getenv("MODEL_SERVER_MAX_BATCH", "4096"))
+MODEL_SERVER_MAX_WAIT_MS = float(os.getenv("MODEL_SERVER_MAX_WAIT_MS", "0.5"))
+MODEL_SERVER_MAX_ROWS = int(os.getenv("MODEL_SERVER_MAX_ROWS", "100000"))
+
+
+def encode_response(request_id: int, pred: np.ndarray, probs: np.ndarray, batch_rows: int) -> bytes:
+    n_rows, n_classes = probs.shape
+    header = RESPONSE_HEADER.pack(
+        MAGIC, VERSION, request_id, n_rows, n_classes, STATUS_OK, batch_rows
+    )
+    return (
+        header
+        + np.ascontiguousarray(pred, dtype="<i8").tobytes()
+        + np.ascontiguousarray(probs, dtype="<f8").tobytes()
+    )
+
+
+def encode_error(request_id: int) -> bytes:
+    return RESPONSE_HEADER.pack(MAGIC, VERSION, request_id, 0, 0, STATUS_ERROR, 0)
+
+
+class _Pending:
+    __slots__ = ("features", "future")
+
+    def __init__(self, features: np.ndarray, future: asyncio.Future):
+        self.features = features
+        self.future = future
+
+
+class ModelServer:
+    """Recebe linhas de varios workers e agrupa numa unica chamada ao modelo."""
+
+    def __init__(self, path: str, max_batch: int, max_wait_ms: float):
+        self.path = path
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.n_features = None
+        self._queue = asyncio.Queue()
+
+    async def serve(self):
+        # Importa aqui: so o processo servidor carrega o modelo para servir
+        from app.model_loader import MODELO_OK, modelo
+
+        if not MODELO_OK:
+            raise SystemExit("Modelo nao carregado")
+        self.n_features = modelo.n_features_in_
+
+        Path(self.path).unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self._handle, path=self.path)
+        os.chmod(self.path, 0o660)
+        batcher = asyncio.create_task(self._batch_loop())
+        logger.info(
+            "model_server_started",
+            extra={"socket": self.path, "max_batch": self.max_batch, "max_wait_ms": self.max_wait * 1000},
+        )
+        # SIGTERM: para de aceitar conexoes e remove o socket
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            batcher.cancel()
+            Path(self.path).unlink(missing_ok=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Uma conexao por socket do pool do worker (um pedido por vez)."""
+        try:
+            while True:
+                header = await reader.readexactly(REQUEST_HEADER.size)
+                magic, version, request_id, n_rows, n_features = REQUEST_HEADER.unpack(header)
+                if magic != MAGIC or version != VERSION or n_rows > MODEL_SERVER_MAX_ROWS:
+                    logger.warning("model_server_bad_request", extra={"request_id": request_id})
+                    break
+                payload = await reader.readexactly(n_rows * n_features * 8)
+                if n_features != self.n_features:
+                    # Nao pode entrar no lote: o vstack com os demais pedidos falharia
+                    logger.warning(
+                        "model_server_bad_request",
+                        extra={"request_id": request_id, "n_features": n_features},
+                    )
+                    writer.write(encode_error(request_id))
+                    await writer.drain()
+                    continue
+                features = np.frombuffer(payload, dtype="<f8").reshape(n_rows, n_features)
+
+                future = asyncio.get_running_loop().create_future()
+                await self._queue.put(_Pending(features, future))
+                try:
+                    pred, probs, batch_rows = await future
+                    writer.write(encode_response(request_id, pred, probs, batch_rows))
+                except Exception:
+                    writer.write(encode_error(request_id))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _batch_loop(self):
+        """
+        Junta pedidos ate max_batch linhas ou max_wait e chama o modelo uma vez.
+
+        Enquanto o modelo roda, novos pedidos se acumulam na fila e entram no
+        proximo lote (agrupamento natural sob carga, sem espera extra).
+        """
+        from app.model_loader import predict_with_proba
+
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            rows = len(batch[0].features)
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_batch:
+                try:
+                    if self._queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    else:
+                        item = self._queue.get_nowait()
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                rows += len(item.features)
+
+            start = time.perf_counter()
+            # Qualquer erro aqui responde o lote com erro; se escapasse, a task
+            # morreria e o processo seguiria aceitando conexoes sem responder
+            try:
+                features = np.vstack([p.features for p in batch])
+                pred, probs = await loop.run_in_executor(None, predict_with_proba, features)
+            except Exception as exc:
+                logger.error("model_server_inference_failed", extra={"error": str(exc)})
+                for p in batch:
+                    if not p.future.done():
+                        p.future.set_exception(exc)
+                continue
+
+            offset = 0
+            for p in batch:
+                n = len(p.features)
+                if not p.future.done():
+                    p.future.set_result((pred[offset:offset + n], probs[offset:offset + n], rows))
+                offset += n
+            logger.debug(
+                "model_server_batch",
+                extra={
+                    "requests": len(batch),
+                    "rows": rows,
+                    "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+                },
+            )
+
+
+def main():
+    if not MODEL_SERVER_SOCKET:
+        raise SystemExit("Defina MODEL_SERVER_SOCKET (ex: /tmp/iris-model.sock)")
+    server = ModelServer(MODEL_SERVER_SOCKET, MODEL_SERVER_MAX_BATCH, MODEL_SERVER_MAX_WAIT_MS)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Respostas JSON pre-serializadas com ETag forte.
+
+Rotas de metadados (/, /health, /model/info) devolvem sempre o mesmo
+conteudo enquanto o modelo e a configuracao nao mudam, e monitores chamam
+/health a cada poucos segundos. Em vez de montar e serializar o dicionario
+a cada chamada, o corpo eh gerado uma vez em bytes e servido direto.
+
+O ETag eh o hash do corpo: clientes que mandam If-None-Match recebem 304
+sem corpo enquanto nada mudou.
+"""
+import hashlib
+import json
+
+from fastapi import Request, Response
+
+
+class PrebuiltResponse:
+    """
+    Corpo JSON em bytes + ETag, pronto para servir.
+
+    Exemplo de uso:
+        HEALTH = PrebuiltResponse({"status": "healthy"})
+        return HEALTH.respond(request)
+    """
+
+    __slots__ = ("content", "body", "etag", "headers")
+
+    def __init__(self, content: dict):
+        self.content = content
+        # Mesma serializacao do JSONResponse (corpo identico ao anterior)
+        self.body = json.dumps(
+            content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        # no-cache = pode guardar, mas revalida sempre (via If-None-Match)
+        self.headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """Comparacao fraca do If-None-Match (RFC 9110), como pede a spec."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == self.etag:
+                return True
+        return False
+
+    def respond(self, request: Request) -> Response:
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=self.headers)
+        return Response(self.body, media_type="application/json", headers=self.headers)
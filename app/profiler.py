@@ -0,0 +1,188 @@
+"""
+Profiler estatistico por amostragem (sob demanda).
+
+Em vez de instrumentar cada funcao (cProfile), uma thread tira "fotos" das
+pilhas de TODAS as threads do processo em intervalos regulares via
+sys._current_frames(). Funcoes que aparecem em mais amostras sao as que
+consomem mais tempo: middleware, auth, limiter, Pydantic, modelo...
+
+Custo controlado:
+- Apenas uma sessao por vez (lock)
+- Duracao maxima (PROFILER_MAX_SECONDS)
+- Se tirar a amostra custar mais que PROFILER_MAX_OVERHEAD do tempo,
+  o intervalo entre amostras aumenta automaticamente
+
+Saidas:
+- collapsed: "thread;frame;frame;frame N" (flamegraph.pl, speedscope, inferno)
+- speedscope: JSON no formato https://www.speedscope.app/file-format-schema.json
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+from app.core import logger
+
+
+# =============================================================================
+# CONFIGURACOES
+# =============================================================================
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "30"))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_MAX_OVERHEAD = float(os.getenv("PROFILER_MAX_OVERHEAD", "0.02"))
+
+
+class ProfilerBusyError(Exception):
+    """Ja existe uma sessao de profiling em andamento."""
+
+
+class SamplingProfiler:
+    """
+    Amostrador de pilhas de todas as threads do worker.
+
+    Exemplo de uso:
+        stacks = sampling_profiler.run(seconds=10)
+        texto = to_collapsed(stacks)
+    """
+
+    def __init__(self, max_seconds: float, interval_ms: float, max_overhead: float):
+        self.max_seconds = max_seconds
+        self.interval = interval_ms / 1000
+        self.max_overhead = max_overhead
+        self._lock = threading.Lock()
+
+    def run(self, seconds: float) -> dict:
+        """
+        Amostra por `seconds` (limitado a max_seconds) e retorna o resultado.
+
+        Returns:
+            {"stacks": Counter{(thread, frame, ...): amostras}, "samples": N,
+             "duration_s": ..., "interval_ms": ..., "overhead": ...}
+
+        Raises:
+            ProfilerBusyError: se outra sessao estiver rodando
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError()
+        try:
+            return self._sample(min(seconds, self.max_seconds))
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float) -> dict:
+        own_thread = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        sampling_time = 0.0
+        interval = self.interval
+
+        start = time.perf_counter()
+        deadline = start + seconds
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_thread:
+                    continue
+                stacks[(names.get(ident, str(ident)), *_walk(frame))] += 1
+            samples += 1
+            cost = time.perf_counter() - t0
+            sampling_time += cost
+
+            # Mantem o custo abaixo de max_overhead: cost / (cost + sleep) <= max
+            interval = max(self.interval, cost / self.max_overhead - cost)
+            time.sleep(interval)
+
+        duration = time.perf_counter() - start
+        logger.info(
+            "profiling_completed",
+            extra={
+                "samples": samples,
+                "duration_s": round(duration, 2),
+                "overhead": round(sampling_time / duration, 4),
+            },
+        )
+        return {
+            "stacks": stacks,
+            "samples": samples,
+            "duration_s": round(duration, 3),
+            "interval_ms": round(interval * 1000, 3),
+            "overhead": round(sampling_time / duration, 4),
+        }
+
+
+def _walk(frame) -> tuple:
+    """Pilha da raiz ate a folha como tuplas (funcao, arquivo, linha)."""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_name, _short_path(code.co_filename), code.co_firstlineno))
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    """Encurta caminhos de site-packages/projeto para facilitar a leitura."""
+    marker = "site-packages" + os.sep
+    idx = filename.rfind(marker)
+    if idx != -1:
+        return filename[idx + len(marker):]
+    if filename.startswith(os.getcwd()):
+        return os.path.relpath(filename)
+    return filename
+
+
+# =============================================================================
+# FORMATOS DE SAIDA
+# =============================================================================
+
+def to_collapsed(result: dict) -> str:
+    """Formato 'collapsed stacks' (uma linha por pilha distinta)."""
+    lines = []
+    for (thread, *frames), count in result["stacks"].most_common():
+        path = ";".join([thread] + [f"{name} ({file}:{line})" for name, file, line in frames])
+        lines.append(f"{path} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(result: dict) -> dict:
+    """Formato JSON do speedscope (um perfil 'sampled' por thread)."""
+    frame_index = {}
+    frames = []
+    profiles = {}
+
+    for (thread, *stack), count in result["stacks"].items():
+        indices = []
+        for frame in stack:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                name, file, line = frame
+                frames.append({"name": name, "file": file, "line": line})
+            indices.append(frame_index[frame])
+        profile = profiles.setdefault(
+            thread,
+            {"type": "sampled", "name": thread, "unit": "none",
+             "startValue": 0, "endValue": 0, "samples": [], "weights": []},
+        )
+        profile["samples"].append(indices)
+        profile["weights"].append(count)
+        profile["endValue"] += count
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": f"api-iris-v2 ({result['samples']} amostras)",
+        "exporter": "api-iris-v2",
+        "shared": {"frames": frames},
+        "profiles": list(profiles.values()),
+    }
+
+
+sampling_profiler = SamplingProfiler(
+    max_seconds=PROFILER_MAX_SECONDS,
+    interval_ms=PROFILER_INTERVAL_MS,
+    max_overhead=PROFILER_MAX_OVERHEAD,
+)
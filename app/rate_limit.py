@@ -9,7 +9,11 @@ Por que usar:
 
 SlowAPI eh baseado no Flask-Limiter, adaptado para FastAPI
 """
+import asyncio
+import functools
 import os
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
 
 from slowapi import Limiter
 from slowapi.util import get_remote_address
@@ -19,6 +23,7 @@ from fastapi.responses import JSONResponse
 
 from app.logging_config import logger
 from app.metrics import RATE_LIMIT_EXCEEDED
+from app.tracing import span
 
 
 # =============================================================================
@@ -48,11 +53,81 @@ PREDICT_RATE_LIMIT = os.getenv("RATE_LIMIT_PREDICT", "30/minute")
 BATCH_RATE_LIMIT = os.getenv("RATE_LIMIT_BATCH", "10/minute")
 LOGIN_RATE_LIMIT = os.getenv("RATE_LIMIT_LOGIN", "10/minute")
 
+# memory:// conta por processo: com varios workers (app/server.py) ou
+# replicas, use um storage compartilhado, ex: redis://redis:6379
+# (requer o pacote redis)
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+
+# Span "rate_limit" aberto por TracedLimiter e ainda nao fechado
+_pending_check = ContextVar("pending_rate_limit_check", default=None)
+
+
+class TracedLimiter(Limiter):
+    """
+    Limiter que registra cada checagem de limite como span 'rate_limit'.
+
+    Usa so a API publica (limit): o span abre antes do wrapper do slowapi e
+    fecha quando ele chama o endpoint, ou seja, logo apos a checagem. Se o
+    limite estourar, o span fecha com erro junto com o RateLimitExceeded.
+    """
+
+    def limit(self, *args, **kwargs):
+        decorate = super().limit(*args, **kwargs)
+
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def checked(*a, **kw):
+                    _close_pending_check()
+                    return await func(*a, **kw)
+
+                limited = decorate(checked)
+
+                @functools.wraps(func)
+                async def traced(*a, **kw):
+                    with _open_check():
+                        return await limited(*a, **kw)
+            else:
+                @functools.wraps(func)
+                def checked(*a, **kw):
+                    _close_pending_check()
+                    return func(*a, **kw)
+
+                limited = decorate(checked)
+
+                @functools.wraps(func)
+                def traced(*a, **kw):
+                    with _open_check():
+                        return limited(*a, **kw)
+
+            return traced
+
+        return decorator
+
+
+@contextmanager
+def _open_check():
+    with ExitStack() as stack:
+        stack.enter_context(span("rate_limit"))
+        token = _pending_check.set(stack)
+        try:
+            yield
+        finally:
+            _pending_check.reset(token)
+
+
+def _close_pending_check():
+    stack = _pending_check.get()
+    if stack is not None:
+        _pending_check.set(None)
+        stack.close()
+
+
 # Cria o limiter
-limiter = Limiter(
+limiter = TracedLimiter(
     key_func=get_client_identifier,
     default_limits=[DEFAULT_RATE_LIMIT],
-    storage_uri="memory://",  # Em producao, use Redis para multiplas instancias
+    storage_uri=RATE_LIMIT_STORAGE_URI,
 )
 
 
@@ -0,0 +1,142 @@
+"""
+Monitor de saturacao para o endpoint /ready.
+
+/health diz apenas "o processo esta vivo". /ready responde "posso receber
+mais trafego agora?" e devolve 503 quando a instancia esta:
+- sem modelo ou com a inferencia canario falhando/desatualizada
+- com o event loop atrasado (loop lag alto = CPU saturada ou codigo bloqueante)
+- com muitas requisicoes em andamento
+- com o threadpool quase todo ocupado
+- com fila de inferencia longa (ver scheduler.py)
+
+Tudo eh medido em background; o probe so le valores ja calculados
+(custo de microssegundos).
+"""
+import asyncio
+import os
+import time
+
+import anyio.to_thread
+import numpy as np
+
+from app.core import logger
+from app.model_loader import MODELO_OK, predict_with_proba
+from app.scheduler import inference_scheduler
+
+
+# =============================================================================
+# CONFIGURACOES
+# =============================================================================
+READY_CHECK_INTERVAL = float(os.getenv("READY_CHECK_INTERVAL", "0.25"))
+READY_CANARY_INTERVAL = float(os.getenv("READY_CANARY_INTERVAL", "10"))
+READY_MAX_LOOP_LAG_MS = float(os.getenv("READY_MAX_LOOP_LAG_MS", "200"))
+READY_MAX_INFLIGHT = int(os.getenv("READY_MAX_INFLIGHT", "200"))
+READY_MAX_THREADPOOL_UTIL = float(os.getenv("READY_MAX_THREADPOOL_UTIL", "0.9"))
+READY_MAX_QUEUE_DEPTH = int(os.getenv("READY_MAX_QUEUE_DEPTH", "50"))
+
+# Flor conhecida (setosa) usada como inferencia canario
+CANARY_FEATURES = np.array([[5.1, 3.5, 1.4, 0.2]])
+
+
+class SaturationMonitor:
+    """
+    Coleta loop lag, requisicoes em andamento e resultado do canario.
+
+    Exemplo de uso:
+        ready, status = saturation_monitor.status()
+    """
+
+    def __init__(self):
+        self.inflight = 0
+        self.loop_lag_ms = 0.0
+        self.canary_ok = False
+        self.canary_latency_ms = None
+        self.canary_at = None
+        self._task = None
+
+    # -------------------------------------------------------------------------
+    # Chamado pelo LoggingMiddleware
+    # -------------------------------------------------------------------------
+    def request_started(self):
+        self.inflight += 1
+
+    def request_finished(self):
+        self.inflight -= 1
+
+    # -------------------------------------------------------------------------
+    # Ciclo de vida (startup/shutdown da aplicacao)
+    # -------------------------------------------------------------------------
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        next_canary = 0.0
+        while True:
+            # Loop lag: quanto o sleep atrasou alem do pedido
+            expected = time.perf_counter() + READY_CHECK_INTERVAL
+            await asyncio.sleep(READY_CHECK_INTERVAL)
+            self.loop_lag_ms = max(0.0, (time.perf_counter() - expected) * 1000)
+
+            if MODELO_OK and time.monotonic() >= next_canary:
+                await self._canary()
+                next_canary = time.monotonic() + READY_CANARY_INTERVAL
+
+    async def _canary(self):
+        start = time.perf_counter()
+        try:
+            pred, probs = await anyio.to_thread.run_sync(predict_with_proba, CANARY_FEATURES)
+            self.canary_ok = len(pred) == 1 and bool(np.isclose(probs[0].sum(), 1.0))
+        except Exception as exc:
+            self.canary_ok = False
+            logger.error("canary_failed", extra={"error": str(exc)})
+        self.canary_latency_ms = round((time.perf_counter() - start) * 1000, 3)
+        self.canary_at = time.monotonic()
+
+    # -------------------------------------------------------------------------
+    # Probe (apenas le valores ja coletados)
+    # -------------------------------------------------------------------------
+    def status(self) -> tuple[bool, dict]:
+        """Retorna (pronto, detalhes). Deve ser chamado no event loop."""
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        threadpool_util = limiter.borrowed_tokens / limiter.total_tokens
+        queue_depth = inference_scheduler.queue_depth
+        canary_age = time.monotonic() - self.canary_at if self.canary_at else None
+
+        reasons = []
+        if not MODELO_OK:
+            reasons.append("model_not_loaded")
+        elif canary_age is None:
+            reasons.append("canary_pending")
+        elif not self.canary_ok:
+            reasons.append("canary_failed")
+        elif canary_age > 3 * READY_CANARY_INTERVAL:
+            reasons.append("canary_stale")
+        if self.loop_lag_ms > READY_MAX_LOOP_LAG_MS:
+            reasons.append("loop_lag")
+        if self.inflight > READY_MAX_INFLIGHT:
+            reasons.append("inflight")
+        if threadpool_util > READY_MAX_THREADPOOL_UTIL:
+            reasons.append("threadpool")
+        if queue_depth > READY_MAX_QUEUE_DEPTH:
+            reasons.append("inference_queue")
+
+        return not reasons, {
+            "ready": not reasons,
+            "reasons": reasons,
+            "loop_lag_ms": round(self.loop_lag_ms, 2),
+            "inflight": self.inflight,
+            "threadpool_util": round(threadpool_util, 3),
+            "inference_queue": queue_depth,
+            "canary_ok": self.canary_ok,
+            "canary_latency_ms": self.canary_latency_ms,
+            "canary_age_s": round(canary_age, 1) if canary_age is not None else None,
+        }
+
+
+saturation_monitor = SaturationMonitor()
@@ -1,4 +1,4 @@
-from . import auth, info, predict
+from . import admin, auth, info, predict
 
-__all__ = ["auth", "info", "predict"]
+__all__ = ["admin", "auth", "info", "predict"]
 
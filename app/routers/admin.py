@@ -0,0 +1,56 @@
+"""
+Rotas administrativas (apenas role admin).
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.auth import require_admin
+from app.core import logger
+from app.profiler import (
+    PROFILER_MAX_SECONDS,
+    ProfilerBusyError,
+    sampling_profiler,
+    to_collapsed,
+    to_speedscope,
+)
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/profile")
+async def profile(
+    request: Request,
+    seconds: float = Query(5.0, gt=0, le=PROFILER_MAX_SECONDS),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Roda o profiler por amostragem em todas as threads do worker.
+
+    **Requer role admin.** Apenas uma sessao por vez (409 se ocupado).
+
+    - `format=collapsed`: texto para flamegraph.pl / speedscope
+    - `format=speedscope`: JSON para abrir direto em https://www.speedscope.app
+    """
+    logger.info(
+        "profiling_started",
+        extra={
+            "user": current_user["username"],
+            "seconds": seconds,
+            "trace_id": getattr(request.state, "trace_id", "N/A"),
+        },
+    )
+    try:
+        result = await run_in_threadpool(sampling_profiler.run, seconds)
+    except ProfilerBusyError:
+        raise HTTPException(status_code=409, detail="Profiling ja em andamento")
+
+    headers = {
+        "X-Profile-Samples": str(result["samples"]),
+        "X-Profile-Overhead": str(result["overhead"]),
+    }
+    if format == "speedscope":
+        return JSONResponse(to_speedscope(result), headers=headers)
+    return PlainTextResponse(to_collapsed(result), headers=headers)
@@ -1,28 +1,37 @@
 """
 Rotas de informacao/saude da API.
+
+/, /health e /model/info so mudam quando o modelo ou a configuracao mudam:
+os corpos sao montados uma vez (rebuild_metadata_responses) e servidos
+como bytes com ETag. /ready eh dinamico e continua sendo calculado.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
 
+from app import model_loader
 from app.auth import get_current_user
-from app.core import API_VERSION, ENVIRONMENT
-from app.model_loader import MODELO_OK, modelo, classes
+from app.core import API_VERSION, ENVIRONMENT, logger
+from app.prebuilt import PrebuiltResponse
+from app.readiness import saturation_monitor
 
 
 router = APIRouter(tags=["Info"])
 
+# Preenchido por rebuild_metadata_responses() no import
+_responses: dict[str, PrebuiltResponse] = {}
 
-@router.get("/")
-def home():
-    """Informacoes da API."""
+
+def _home_content() -> dict:
     return {
         "api": "Iris Classifier",
         "versao": API_VERSION,
         "ambiente": ENVIRONMENT,
-        "modelo_carregado": MODELO_OK,
+        "modelo_carregado": model_loader.MODELO_OK,
         "docs": "/docs",
         "redoc": "/redoc",
         "metrics": "/metrics",
         "health": "/health",
+        "ready": "/ready",
         "endpoints": {
             "login": "POST /login",
             "predict": "POST /predict",
@@ -31,30 +40,20 @@ def home():
     }
 
 
-@router.get("/health")
-def health():
-    """Health check para monitoramento."""
+def _health_content() -> dict:
     return {
-        "status": "healthy" if MODELO_OK else "degraded",
-        "modelo": MODELO_OK,
+        "status": "healthy" if model_loader.MODELO_OK else "degraded",
+        "modelo": model_loader.MODELO_OK,
         "ambiente": ENVIRONMENT,
         "version": API_VERSION,
     }
 
 
-@router.get("/model/info")
-def model_info(current_user: dict = Depends(get_current_user)):
-    """
-    Retorna informacoes sobre o modelo carregado.
-
-    Util para debugging e documentacao.
-    """
-    if not MODELO_OK:
-        raise HTTPException(status_code=503, detail="Modelo nao disponivel")
-
+def _model_info_content() -> dict:
+    classes = model_loader.classes
     return {
         "modelo_carregado": True,
-        "tipo": type(modelo).__name__,
+        "tipo": type(model_loader.modelo).__name__,
         "classes": list(classes) if classes else [],
         "n_classes": len(classes) if classes else 0,
         "features_esperadas": [
@@ -64,4 +63,76 @@ def model_info(current_user: dict = Depends(get_current_user)):
             "petal_width",
         ],
         "versao_api": API_VERSION,
+        "inferencia": {
+            "chunk_rows": model_loader.INFERENCE_CHUNK_ROWS,
+            "parallelism": model_loader.INFERENCE_PARALLELISM,
+            "calibracao": model_loader.calibration,
+        },
     }
+
+
+def rebuild_metadata_responses():
+    """
+    (Re)monta os corpos de /, /health e /model/info.
+
+    Chamar depois de carregar ou trocar o modelo. Rotas cujo corpo nao
+    mudou mantem o mesmo ETag (clientes continuam recebendo 304).
+    """
+    builders = {"home": _home_content, "health": _health_content}
+    if model_loader.MODELO_OK:
+        builders["model_info"] = _model_info_content
+
+    changed = []
+    for name, build in builders.items():
+        prebuilt = PrebuiltResponse(build())
+        current = _responses.get(name)
+        if current is None or current.etag != prebuilt.etag:
+            _responses[name] = prebuilt
+            changed.append(name)
+    if not model_loader.MODELO_OK:
+        _responses.pop("model_info", None)
+
+    if changed:
+        logger.info("metadata_responses_built", extra={"routes": changed})
+
+
+rebuild_metadata_responses()
+
+
+@router.get("/")
+async def home(request: Request):
+    """Informacoes da API."""
+    return _responses["home"].respond(request)
+
+
+@router.get("/health")
+async def health(request: Request):
+    """Health check para monitoramento."""
+    return _responses["health"].respond(request)
+
+
+@router.get("/ready")
+async def ready():
+    """
+    Readiness para o load balancer.
+
+    Retorna 503 quando a instancia esta carregando ou saturada
+    (canario falhando, loop lag, threadpool ou fila de inferencia cheios),
+    para o trafego ir para outras replicas. /health continua sendo o liveness.
+    """
+    is_ready, status = saturation_monitor.status()
+    return JSONResponse(status, status_code=200 if is_ready else 503)
+
+
+@router.get("/model/info")
+async def model_info(request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Retorna informacoes sobre o modelo carregado.
+
+    Util para debugging e documentacao. O 304 so sai depois da
+    autenticacao (o ETag nao vaza para quem nao tem token).
+    """
+    prebuilt = _responses.get("model_info")
+    if prebuilt is None:
+        raise HTTPException(status_code=503, detail="Modelo nao disponivel")
+    return prebuilt.respond(request)
@@ -5,17 +5,23 @@ import time
 
 import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 
+from app.audit import prediction_store
 from app.auth import get_current_user
 from app.core import logger
 from app.metrics import (
+    BATCH_DEDUP_RATIO,
     BATCH_PREDICTION_LATENCY,
     BATCH_PREDICTIONS_TOTAL,
     PREDICTION_LATENCY,
     PREDICTIONS_TOTAL,
 )
-from app.model_loader import MODELO_OK, classes, modelo
+from app.model_client import predict_with_proba
+from app.model_loader import MODELO_OK, classes
 from app.rate_limit import BATCH_RATE_LIMIT, PREDICT_RATE_LIMIT, limiter
+from app.scheduler import inference_scheduler
+from app.tracing import TracedRoute, span
 from app.schemas import (
     BatchPredictItem,
     BatchPredictRequest,
@@ -25,12 +31,13 @@ from app.schemas import (
 )
 
 
-router = APIRouter(tags=["Predicao"])
+# Validacao do corpo vira o span "validation" (ver TracedRoute)
+router = APIRouter(tags=["Predicao"], route_class=TracedRoute)
 
 
 @router.post("/predict", response_model=IrisResponse)
 @limiter.limit(PREDICT_RATE_LIMIT)
-def predict(
+async def predict(
     request: Request,
     payload: IrisRequest,
     current_user: dict = Depends(get_current_user),
@@ -45,6 +52,13 @@ def predict(
     if not MODELO_OK:
         raise HTTPException(status_code=503, detail="Modelo nao disponivel")
 
+    # Espera a vez do usuario (fila justa) e roda a inferencia no threadpool
+    async with inference_scheduler.slot(current_user, cost=1):
+        return await run_in_threadpool(_predict, request, payload, current_user)
+
+
+def _predict(request: Request, payload: IrisRequest, current_user: dict) -> IrisResponse:
+    """Inferencia de /predict (roda no threadpool, com slot garantido)."""
     trace_id = getattr(request.state, "trace_id", "N/A")
     start = time.perf_counter()
 
@@ -59,13 +73,25 @@ def predict(
         ]
     )
 
-    pred_idx = modelo.predict(features)[0]
-    probs = modelo.predict_proba(features)[0]
+    with span("inference", rows=1):
+        pred_indices, all_probs = predict_with_proba(features)
+    pred_idx = pred_indices[0]
+    probs = all_probs[0]
     classe = classes[pred_idx]
     confidence = float(max(probs))
+    probabilidades = {classes[i]: round(float(p), 4) for i, p in enumerate(probs)}
 
     latency = time.perf_counter() - start
 
+    # Auditoria (apenas enfileira, sem I/O no caminho da requisicao)
+    prediction_store.record(
+        user=current_user["username"],
+        trace_id=trace_id,
+        features=features[0],
+        classe=classe,
+        probabilidades=probabilidades,
+    )
+
     # Metricas
     PREDICTIONS_TOTAL.labels(classe=classe, user=current_user["username"]).inc()
     PREDICTION_LATENCY.observe(latency)
@@ -82,17 +108,18 @@ def predict(
         },
     )
 
-    return IrisResponse(
-        sucesso=True,
-        classe=classe,
-        probabilidades={classes[i]: round(float(p), 4) for i, p in enumerate(probs)},
-        usuario=current_user["username"],
-    )
+    with span("serialization"):
+        return IrisResponse(
+            sucesso=True,
+            classe=classe,
+            probabilidades=probabilidades,
+            usuario=current_user["username"],
+        )
 
 
 @router.post("/predict/batch", response_model=BatchPredictResponse)
 @limiter.limit(BATCH_RATE_LIMIT)
-def predict_batch(
+async def predict_batch(
     request: Request,
     payload: BatchPredictRequest,
     current_user: dict = Depends(get_current_user),
@@ -114,6 +141,15 @@ def predict_batch(
     if not MODELO_OK:
         raise HTTPException(status_code=503, detail="Modelo nao disponivel")
 
+    # Custo proporcional ao numero de linhas do lote
+    async with inference_scheduler.slot(current_user, cost=len(payload.items)):
+        return await run_in_threadpool(_predict_batch, request, payload, current_user)
+
+
+def _predict_batch(
+    request: Request, payload: BatchPredictRequest, current_user: dict
+) -> BatchPredictResponse:
+    """Inferencia de /predict/batch (roda no threadpool, com slot garantido)."""
     trace_id = getattr(request.state, "trace_id", "N/A")
     start = time.perf_counter()
 
@@ -129,38 +165,69 @@ def predict_batch(
     ]
     features = np.array(features_list)
 
+    # Deduplicacao: lotes de campo costumam repetir a mesma medicao.
+    # Pontua apenas as linhas distintas e espalha o resultado na ordem original
+    # via indice inverso (resultado identico ao de pontuar linha a linha).
+    unique_features, inverse, counts = np.unique(
+        features, axis=0, return_inverse=True, return_counts=True
+    )
+    inverse = inverse.reshape(-1)
+
     # Predicao em lote (mais eficiente que loop)
-    pred_indices = modelo.predict(features)
-    all_probs = modelo.predict_proba(features)
+    with span("inference", rows=len(unique_features)):
+        pred_indices, all_probs = predict_with_proba(unique_features)
 
-    # Monta resposta
-    predicoes = []
-    for i, (pred_idx, probs) in enumerate(zip(pred_indices, all_probs)):
+    # Resultado de cada linha distinta (calculado uma unica vez)
+    resultados = []
+    for pred_idx, probs, count in zip(pred_indices, all_probs, counts):
         classe = classes[pred_idx]
-        confidence = float(max(probs))
-
-        predicoes.append(
-            BatchPredictItem(
-                indice=i,
-                classe=classe,
-                confianca=round(confidence, 4),
-                probabilidades={
-                    classes[j]: round(float(p), 4) for j, p in enumerate(probs)
-                },
+        resultados.append(
+            (
+                classe,
+                round(float(max(probs)), 4),
+                {classes[j]: round(float(p), 4) for j, p in enumerate(probs)},
             )
         )
 
-        # Metrica por classe
-        PREDICTIONS_TOTAL.labels(classe=classe, user=current_user["username"]).inc()
+        # Metrica por classe (uma unidade por linha original)
+        PREDICTIONS_TOTAL.labels(classe=classe, user=current_user["username"]).inc(
+            int(count)
+        )
+
+    # Monta resposta na ordem original
+    with span("serialization", rows=len(inverse)):
+        predicoes = []
+        for i, u in enumerate(inverse):
+            classe, confianca, probabilidades = resultados[u]
+            predicoes.append(
+                BatchPredictItem(
+                    indice=i,
+                    classe=classe,
+                    confianca=confianca,
+                    probabilidades=dict(probabilidades),
+                )
+            )
+
+            # Auditoria (apenas enfileira, sem I/O no caminho da requisicao)
+            prediction_store.record(
+                user=current_user["username"],
+                trace_id=trace_id,
+                features=features[i],
+                classe=classe,
+                probabilidades=probabilidades,
+            )
 
     latency = time.perf_counter() - start
     batch_size = len(payload.items)
+    unique_size = len(unique_features)
+    dedup_ratio = 1 - unique_size / batch_size
 
     # Metricas
     BATCH_PREDICTIONS_TOTAL.labels(
         user=current_user["username"], batch_size=str(batch_size)
     ).inc()
     BATCH_PREDICTION_LATENCY.observe(latency)
+    BATCH_DEDUP_RATIO.observe(dedup_ratio)
 
     # Log
     logger.info(
@@ -169,6 +236,8 @@ def predict_batch(
             "trace_id": trace_id,
             "user": current_user["username"],
             "batch_size": batch_size,
+            "unique_items": unique_size,
+            "dedup_ratio": round(dedup_ratio, 4),
             "latency_ms": round(latency * 1000, 2),
             "avg_latency_per_item_ms": round((latency * 1000) / batch_size, 2),
         },
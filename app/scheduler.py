@@ -0,0 +1,156 @@
+"""
+Escalonamento justo (Weighted Fair Queueing) do trabalho de inferencia.
+
+Sem escalonador, um unico cliente mandando lotes de 100 itens ocupa todas as
+threads do threadpool e aumenta a latencia de /predict para todo mundo.
+
+Aqui a inferencia so roda depois de obter um "slot" (limite de concorrencia).
+Quando nao ha slot livre, os pedidos esperam numa fila ordenada pelo
+tempo virtual de termino (WFQ):
+
+    inicio  = max(tempo_virtual, ultimo_termino[usuario])
+    termino = inicio + custo / peso[role]
+
+- custo: numero de linhas (1 para /predict, len(items) para /predict/batch)
+- peso: definido por role (admin pesa mais que user)
+
+Assim cada usuario recebe uma fatia proporcional ao seu peso, independente
+de quantas requisicoes ele enfileira.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+
+from app.metrics import INFERENCE_QUEUE_DEPTH, INFERENCE_QUEUE_WAIT
+from app.model_loader import INFERENCE_PARALLELISM
+from app.tracing import span
+
+
+# =============================================================================
+# CONFIGURACOES
+# =============================================================================
+# Default vem da calibracao do modelo (ou do numero de CPUs)
+INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", str(INFERENCE_PARALLELISM)))
+
+def _parse_weights(value: str) -> dict:
+    """
+    "role=peso,role=peso" -> {role: peso} (roles ausentes usam peso 1).
+
+    Peso <= 0 (ou inf/nan) quebraria custo / peso em toda requisicao da
+    role: falha no startup em vez de em producao.
+    """
+    weights = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        role, weight = item.split("=")
+        weight = float(weight)
+        if not math.isfinite(weight) or weight <= 0:
+            raise ValueError(f"SCHEDULER_ROLE_WEIGHTS: peso de '{role.strip()}' deve ser > 0")
+        weights[role.strip()] = weight
+    return weights
+
+
+ROLE_WEIGHTS = _parse_weights(os.getenv("SCHEDULER_ROLE_WEIGHTS", "admin=4,user=1"))
+
+# Acima disso, remove usuarios que ja nao tem trabalho pendente
+MAX_TRACKED_TENANTS = 1024
+
+
+class FairScheduler:
+    """
+    Fila WFQ com limite de concorrencia (roda no event loop, sem locks).
+
+    Exemplo de uso:
+        async with inference_scheduler.slot(current_user, cost=len(items)):
+            resultado = await run_in_threadpool(funcao_de_inferencia)
+    """
+
+    def __init__(self, concurrency: int, weights: dict):
+        self.concurrency = concurrency
+        self.weights = weights
+        self._available = concurrency
+        self._queue = []  # heap de (termino, seq, inicio, future)
+        # Pedidos realmente esperando: entradas canceladas ficam no heap ate o
+        # proximo _release, entao len(_queue) contaria clientes que ja desistiram
+        self._waiting = 0
+        self._virtual_time = 0.0
+        self._last_finish = {}  # usuario -> termino virtual do ultimo pedido
+        self._seq = itertools.count()
+
+    @property
+    def queue_depth(self) -> int:
+        """Pedidos aguardando slot (sem contar os cancelados)."""
+        return self._waiting
+
+    @asynccontextmanager
+    async def slot(self, user: dict, cost: int):
+        """Espera a vez do usuario e segura um slot durante o bloco."""
+        tenant = user["username"]
+        role = user["role"]
+        weight = self.weights.get(role, 1.0)
+
+        start_tag = max(self._virtual_time, self._last_finish.get(tenant, 0.0))
+        finish_tag = start_tag + cost / weight
+        self._last_finish[tenant] = finish_tag
+        if len(self._last_finish) > MAX_TRACKED_TENANTS:
+            self._prune()
+
+        start = time.perf_counter()
+        if self._available > 0 and not self._waiting:
+            self._available -= 1
+            # Tempo virtual nunca volta: um pedido antigo e caro pode ter
+            # inicio menor que o de um ja despachado
+            self._virtual_time = max(self._virtual_time, start_tag)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._queue, (finish_tag, next(self._seq), start_tag, future))
+            self._waiting += 1
+            INFERENCE_QUEUE_DEPTH.set(self._waiting)
+            try:
+                with span("queue_wait", role=role):
+                    await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Cliente desconectou depois de receber o slot: devolve
+                    self._release()
+                else:
+                    # Desistiu ainda na fila (a entrada sai do heap no _release)
+                    self._waiting -= 1
+                    INFERENCE_QUEUE_DEPTH.set(self._waiting)
+                raise
+
+        INFERENCE_QUEUE_WAIT.labels(user=tenant, role=role).observe(
+            time.perf_counter() - start
+        )
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        """Passa o slot para o pedido com menor termino virtual."""
+        while self._queue:
+            _, _, start_tag, future = heapq.heappop(self._queue)
+            if future.cancelled():
+                continue
+            self._virtual_time = max(self._virtual_time, start_tag)
+            future.set_result(None)
+            self._waiting -= 1
+            INFERENCE_QUEUE_DEPTH.set(self._waiting)
+            return
+        self._available += 1
+
+    def _prune(self):
+        self._last_finish = {
+            tenant: finish
+            for tenant, finish in self._last_finish.items()
+            if finish > self._virtual_time
+        }
+
+
+inference_scheduler = FairScheduler(INFERENCE_CONCURRENCY, ROLE_WEIGHTS)
@@ -0,0 +1,300 @@
+"""
+Launcher de producao da API Iris v2.
+
+Substitui o `uvicorn app.main:app` de processo unico por:
+- N workers dimensionados pelas CPUs disponiveis (respeita limites de cgroup
+  do container, nao apenas os cores da maquina; ver app/cpus.py)
+- uvloop/httptools quando instalados (uvicorn[standard])
+- App e modelo carregados UMA vez no processo pai antes do fork
+  (workers compartilham as paginas de memoria via copy-on-write)
+- keep-alive e backlog ajustaveis
+- SIGTERM drena conexoes em andamento antes de encerrar
+- Com MODEL_SERVER_SOCKET definido, sobe tambem o servidor de modelo local
+  (app/model_server.py) que agrupa a inferencia de todos os workers
+
+Estado por processo com N > 1 workers:
+- Metricas: o launcher liga o modo multiprocess do prometheus_client
+  (PROMETHEUS_MULTIPROC_DIR) ANTES de importar o app; cada worker grava os
+  valores em arquivos e /metrics agrega todos (MultiProcessCollector).
+- Rate limit: com RATE_LIMIT_STORAGE_URI=memory:// (padrao) cada worker
+  conta sozinho e o limite efetivo vira N vezes o configurado. Use um
+  storage compartilhado (ex: redis://redis:6379) ou WEB_CONCURRENCY=1;
+  o launcher avisa no log quando nao for o caso.
+
+Uso:
+    python -m app.server
+
+Todas as configuracoes podem ser sobrescritas por variaveis de ambiente.
+"""
+import importlib.util
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import uvicorn
+
+from app.core import logger
+from app.cpus import available_cpus
+from app.model_server import MODEL_SERVER_SOCKET
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+# =============================================================================
+# CONFIGURACOES
+# =============================================================================
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WORKERS = int(os.getenv("WEB_CONCURRENCY", str(available_cpus())))
+LOOP = os.getenv("SERVER_LOOP", "uvloop" if _installed("uvloop") else "asyncio")
+HTTP = os.getenv("SERVER_HTTP", "httptools" if _installed("httptools") else "h11")
+BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Maior que o idle timeout do load balancer evita resets de conexao reaproveitada
+KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "65"))
+GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+# Worker que morre antes disso conta como falha de inicializacao (backoff)
+MIN_WORKER_UPTIME = 10.0
+MAX_RESPAWN_BACKOFF = 30.0
+
+
+def _config(app) -> uvicorn.Config:
+    return uvicorn.Config(
+        app,
+        loop=LOOP,
+        http=HTTP,
+        backlog=BACKLOG,
+        timeout_keep_alive=KEEPALIVE,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        access_log=False,  # LoggingMiddleware ja loga cada requisicao em JSON
+        log_config=None,
+    )
+
+
+def _bind() -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((HOST, PORT))
+    sock.listen(BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(app, sock: socket.socket) -> bool:
+    """
+    Roda um servidor uvicorn no socket ja aberto (SIGTERM = drenar e sair).
+
+    Retorna False se o servidor nao chegou a iniciar (ex: startup falhou).
+    """
+    server = uvicorn.Server(_config(app))
+    server.run(sockets=[sock])
+    return server.started
+
+
+def _spawn(app, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        # Filho: restaura sinais padrao (uvicorn instala os proprios handlers)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 1
+        try:
+            _after_fork()
+            code = 0 if _serve(app, sock) else 3
+        except BaseException as exc:
+            logger.error("worker_crashed", extra={"pid": os.getpid(), "error": repr(exc)})
+        finally:
+            os._exit(code)
+    return pid
+
+
+def _setup_multiprocess_metrics() -> str | None:
+    """
+    Liga o modo multiprocess do prometheus_client.
+
+    Precisa rodar antes de qualquer import de prometheus_client (o modo eh
+    decidido no import). Usa PROMETHEUS_MULTIPROC_DIR se definido, senao um
+    diretorio temporario (removido no fim). Arquivos de uma execucao
+    anterior sao apagados. Retorna o diretorio temporario criado, se houver.
+    """
+    created = None
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        path = created = tempfile.mkdtemp(prefix="iris-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    Path(path).mkdir(parents=True, exist_ok=True)
+    for stale in Path(path).glob("*.db"):
+        stale.unlink()
+    return created
+
+
+def _after_fork():
+    """
+    Republica gauges definidos no pai antes do fork.
+
+    No modo multiprocess os valores sao por pid: o filho comeca zerado.
+    """
+    from app.metrics import MODEL_LOADED
+    from app.model_loader import MODELO_OK
+
+    MODEL_LOADED.set(1 if MODELO_OK else 0)
+
+
+def _mark_process_dead(pid: int):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
+
+
+def main():
+    metrics_dir = _setup_multiprocess_metrics() if WORKERS > 1 else None
+
+    # Preload: importa app + modelo no pai, antes do fork
+    from app.main import app
+    from app.rate_limit import RATE_LIMIT_STORAGE_URI
+
+    sock = _bind()
+    logger.info(
+        "server_starting",
+        extra={
+            "host": HOST,
+            "port": PORT,
+            "workers": WORKERS,
+            "loop": LOOP,
+            "http": HTTP,
+            "backlog": BACKLOG,
+            "keepalive_s": KEEPALIVE,
+        },
+    )
+    if WORKERS > 1 and RATE_LIMIT_STORAGE_URI.startswith("memory://"):
+        logger.warning(
+            "rate_limit_per_worker",
+            extra={
+                "workers": WORKERS,
+                "detail": (
+                    f"RATE_LIMIT_STORAGE_URI=memory:// com {WORKERS} workers: limite "
+                    f"efetivo eh {WORKERS}x o configurado. Use redis:// ou WEB_CONCURRENCY=1"
+                ),
+            },
+        )
+
+    # Com servidor de modelo ha sempre um processo filho a supervisionar,
+    # mesmo com um unico worker
+    started = True
+    if WORKERS <= 1 and not MODEL_SERVER_SOCKET:
+        started = _serve(app, sock)
+    else:
+        _supervise(app, sock)
+    sock.close()
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+    logger.info("server_stopped")
+    return 0 if started else 3
+
+
+def _start_model_server() -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", "app.model_server"])
+
+
+def _supervise(app, sock: socket.socket):
+    """Mantem WORKERS processos filhos (e o servidor de modelo) ate o SIGTERM."""
+    # Servidor de modelo antes dos workers: ja esta ouvindo quando chegam pedidos
+    model_server = _start_model_server() if MODEL_SERVER_SOCKET else None
+    workers = {_spawn(app, sock) for _ in range(WORKERS)}
+    started_at = {pid: time.monotonic() for pid in workers}
+    # Recriacoes agendadas (instantes monotonic) e falhas seguidas na partida
+    respawn_at = []
+    failures = 0
+    shutting_down = False
+
+    def _shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        logger.info("server_draining", extra={"signal": signum, "workers": len(workers)})
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    # Supervisiona: recria workers e servidor de modelo que morrerem (exceto
+    # durante o shutdown). Espera apenas pids conhecidos: waitpid(-1) tambem
+    # colheria o servidor de modelo e o trataria como worker.
+    # Workers que morrem logo apos subir (ex: startup falhando) sao recriados
+    # com backoff exponencial, em vez de um loop apertado de fork.
+    deadline = None
+    while workers or respawn_at:
+        now = time.monotonic()
+        if shutting_down and deadline is None:
+            deadline = now + GRACEFUL_TIMEOUT + 5
+            respawn_at.clear()
+
+        for pid in list(workers):
+            try:
+                done, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                workers.discard(pid)
+                continue
+            if done == 0:
+                continue
+            workers.discard(pid)
+            _mark_process_dead(pid)
+            uptime = now - started_at.pop(pid, now)
+            if shutting_down:
+                continue
+            failures = failures + 1 if uptime < MIN_WORKER_UPTIME else 0
+            delay = min(MAX_RESPAWN_BACKOFF, 0.5 * 2 ** (failures - 1)) if failures else 0.0
+            logger.warning(
+                "worker_died",
+                extra={
+                    "pid": pid,
+                    "exit_code": os.waitstatus_to_exitcode(status),
+                    "uptime_s": round(uptime, 1),
+                    "respawn_in_s": delay,
+                },
+            )
+            respawn_at.append(now + delay)
+
+        for when in [t for t in respawn_at if t <= now]:
+            respawn_at.remove(when)
+            pid = _spawn(app, sock)
+            workers.add(pid)
+            started_at[pid] = time.monotonic()
+
+        if model_server is not None and not shutting_down and model_server.poll() is not None:
+            logger.warning(
+                "model_server_died",
+                extra={"pid": model_server.pid, "exit_code": model_server.returncode},
+            )
+            model_server = _start_model_server()
+
+        if deadline is not None and time.monotonic() > deadline:
+            for worker in workers:
+                try:
+                    os.kill(worker, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        time.sleep(0.5)
+
+    # Workers ja drenaram: so agora o servidor de modelo pode sair
+    if model_server is not None:
+        model_server.terminate()
+        try:
+            model_server.wait(timeout=GRACEFUL_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            model_server.kill()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
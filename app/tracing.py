@@ -0,0 +1,342 @@
+"""
+Rastreamento distribuido (W3C Trace Context) com exportacao de spans.
+
+O header `traceparent` (https://www.w3.org/TR/trace-context/) permite seguir
+uma requisicao lenta desde o gateway ate dentro desta API:
+
+    traceparent: 00-<trace_id 32 hex>-<span_id 16 hex>-<flags 2 hex>
+
+Cada requisicao vira um trace com spans filhos:
+    request -> rate_limit, auth, validation, queue_wait, inference, serialization
+
+Amostragem:
+- Head: respeita o flag "sampled" do traceparent recebido; sem traceparent,
+  sorteia com probabilidade TRACE_SAMPLE_RATE
+- Tail: traces lentos (>= TRACE_SLOW_MS) ou com erro (status >= 500)
+  sao SEMPRE exportados
+
+Os spans vao para um buffer em memoria; uma thread em background exporta
+em lotes no formato OTLP/JSON para um collector (TRACE_EXPORT_ENDPOINT)
+ou para um arquivo JSON Lines (TRACE_EXPORT_FILE). Sem exportador
+configurado, apenas o traceparent eh propagado (spans nao sao gravados).
+"""
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from fastapi.routing import APIRoute
+
+from app.core import API_VERSION, logger
+from app.metrics import TRACE_SPANS_DROPPED, TRACES_EXPORTED
+
+
+# =============================================================================
+# CONFIGURACOES
+# =============================================================================
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "500"))
+TRACE_EXPORT_ENDPOINT = os.getenv("TRACE_EXPORT_ENDPOINT", "")  # ex: http://otel-collector:4318
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")  # ex: traces/spans.jsonl
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "2000"))
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", "200"))
+TRACE_FLUSH_INTERVAL = float(os.getenv("TRACE_FLUSH_INTERVAL", "2.0"))
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+INVALID_TRACE_ID = "0" * 32
+INVALID_SPAN_ID = "0" * 16
+
+_current_trace = ContextVar("current_trace", default=None)
+_current_span = ContextVar("current_span", default=None)
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class Span:
+    """Um trecho cronometrado da requisicao."""
+
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: str | None, attributes: dict | None = None):
+        self.name = name
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.error = False
+
+
+class Trace:
+    """Estado de rastreamento de uma requisicao."""
+
+    __slots__ = ("trace_id", "parent_id", "sampled", "recording", "root", "spans")
+
+    def __init__(self, trace_id: str, parent_id: str | None, sampled: bool, recording: bool):
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.recording = recording
+        self.root = None
+        self.spans = []
+
+    @property
+    def traceparent(self) -> str:
+        """traceparent a propagar (span raiz desta API como pai)."""
+        flags = "01" if self.sampled else "00"
+        return f"00-{self.trace_id}-{self.root.span_id}-{flags}"
+
+
+def parse_traceparent(header: str | None):
+    """Retorna (trace_id, parent_span_id, sampled) ou None se invalido."""
+    if not header:
+        return None
+    match = TRACEPARENT_RE.match(header.strip().lower())
+    if not match:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == INVALID_TRACE_ID or parent_id == INVALID_SPAN_ID:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 0x01)
+
+
+# =============================================================================
+# API USADA PELO MIDDLEWARE E PELAS ROTAS
+# =============================================================================
+
+def start_trace(traceparent: str | None, name: str, attributes: dict | None = None) -> Trace:
+    """Continua o trace recebido (ou inicia um novo) e abre o span raiz."""
+    parsed = parse_traceparent(traceparent)
+    if parsed:
+        trace_id, parent_id, sampled = parsed
+    else:
+        trace_id, parent_id = _new_trace_id(), None
+        sampled = random.random() < TRACE_SAMPLE_RATE
+
+    trace = Trace(trace_id, parent_id, sampled, recording=span_exporter.enabled)
+    trace.root = Span(name, parent_id, attributes)
+    _current_trace.set(trace)
+    _current_span.set(trace.root)
+    return trace
+
+
+def finish_trace(trace: Trace, status_code: int, latency_ms: float):
+    """Fecha o span raiz e decide (tail sampling) se o trace sera exportado."""
+    root = trace.root
+    root.end_ns = time.time_ns()
+    root.attributes["http.status_code"] = status_code
+    root.error = status_code >= 500
+
+    if not trace.recording:
+        return
+    if trace.sampled or root.error or latency_ms >= TRACE_SLOW_MS:
+        span_exporter.submit(trace)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Abre um span filho do span atual.
+
+    Exemplo de uso:
+        with span("inference", rows=10):
+            modelo.predict(features)
+    """
+    trace = _current_trace.get()
+    if trace is None or not trace.recording:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException:
+        current.error = True
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.spans.append(current)
+
+
+class TracedRoute(APIRoute):
+    """
+    Rota que registra a validacao do corpo como um unico span 'validation'.
+
+    A validacao fica fora do pydantic: um validator no modelo rodaria para
+    cada item aninhado (ex: 100 itens de um lote), enquanto aqui o span
+    envolve a validacao do corpo inteiro, uma vez por request.
+
+    Exemplo de uso:
+        router = APIRouter(route_class=TracedRoute)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Depende de como o FastAPI (fixado em requirements.txt) valida o
+        # corpo: request_body_to_args chama field.validate de cada body param
+        for field in self.dependant.body_params:
+            model = getattr(field.type_, "__name__", field.name)
+            field.validate = _traced_validate(field.validate, model)
+
+
+def _traced_validate(validate, model: str):
+    def traced(*args, **kwargs):
+        with span("validation", model=model):
+            return validate(*args, **kwargs)
+
+    return traced
+
+
+# =============================================================================
+# EXPORTADOR EM LOTES (OTLP/JSON)
+# =============================================================================
+
+def _otlp_attributes(attributes: dict) -> list:
+    result = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            result.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            result.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            result.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            result.append({"key": key, "value": {"stringValue": str(value)}})
+    return result
+
+
+def _otlp_span(trace: Trace, item: Span) -> dict:
+    return {
+        "traceId": trace.trace_id,
+        "spanId": item.span_id,
+        "parentSpanId": item.parent_id or "",
+        "name": item.name,
+        "kind": 2 if item is trace.root else 1,  # SERVER / INTERNAL
+        "startTimeUnixNano": str(item.start_ns),
+        "endTimeUnixNano": str(item.end_ns),
+        "attributes": _otlp_attributes(item.attributes),
+        "status": {"code": 2 if item.error else 0},  # ERROR / UNSET
+    }
+
+
+def to_otlp(traces: list) -> dict:
+    """Monta um ExportTraceServiceRequest (OTLP/JSON) com varios traces."""
+    spans = [
+        _otlp_span(trace, item)
+        for trace in traces
+        for item in [trace.root, *trace.spans]
+    ]
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _otlp_attributes(
+                        {"service.name": "api-iris-v2", "service.version": API_VERSION}
+                    )
+                },
+                "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": spans}],
+            }
+        ]
+    }
+
+
+class SpanExporter:
+    """Buffer limitado + thread que exporta traces em lotes."""
+
+    def __init__(self, endpoint: str, path: str, buffer_size: int, batch_size: int,
+                 flush_interval: float):
+        self.endpoint = endpoint.rstrip("/")
+        self.path = Path(path) if path else None
+        self.enabled = bool(self.endpoint or self.path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = queue.Queue(maxsize=buffer_size)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submit(self, trace: Trace):
+        """Enfileira o trace; descarta (e conta os spans) se o buffer estiver cheio."""
+        try:
+            self._buffer.put_nowait(trace)
+        except queue.Full:
+            TRACE_SPANS_DROPPED.inc(len(trace.spans) + 1)
+
+    def start(self):
+        """Inicia a thread exportadora."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Para a thread exportando o que restou no buffer."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._export(self._drain(timeout=self.flush_interval))
+        while not self._buffer.empty():
+            self._export(self._drain(timeout=0))
+
+    def _drain(self, timeout: float) -> list:
+        traces = []
+        try:
+            if timeout:
+                traces.append(self._buffer.get(timeout=timeout))
+            while len(traces) < self.batch_size:
+                traces.append(self._buffer.get_nowait())
+        except queue.Empty:
+            pass
+        return traces
+
+    def _export(self, traces: list):
+        if not traces:
+            return
+        body = json.dumps(to_otlp(traces), separators=(",", ":"))
+        try:
+            if self.endpoint:
+                req = urllib.request.Request(
+                    f"{self.endpoint}/v1/traces",
+                    data=body.encode(),
+                    headers={"Content-Type": "application/json"},
+                    method="POST",
+                )
+                urllib.request.urlopen(req, timeout=5).close()
+            if self.path:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(body + "\n")
+            TRACES_EXPORTED.inc(len(traces))
+        except OSError as exc:
+            TRACE_SPANS_DROPPED.inc(sum(len(t.spans) + 1 for t in traces))
+            logger.error("trace_export_failed", extra={"error": str(exc)})
+
+
+span_exporter = SpanExporter(
+    endpoint=TRACE_EXPORT_ENDPOINT,
+    path=TRACE_EXPORT_FILE,
+    buffer_size=TRACE_BUFFER_SIZE,
+    batch_size=TRACE_BATCH_SIZE,
+    flush_interval=TRACE_FLUSH_INTERVAL,
+)
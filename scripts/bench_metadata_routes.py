@@ -0,0 +1,125 @@
+"""
+Micro-benchmark de trafego de monitoramento nas rotas de metadados.
+
+Simula monitores e dashboards: muitas chamadas a /health, algumas a / e
+/model/info (com token), com e sem If-None-Match. Chama o app ASGI
+direto (sem rede nem cliente HTTP) para medir so o custo do servidor:
+middlewares, autenticacao, rota e serializacao.
+
+Uso:
+    python scripts/bench_metadata_routes.py --requests 20000
+    python scripts/bench_metadata_routes.py --mix health=0.9,home=0.05,model_info=0.05
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.auth import create_token  # noqa: E402
+from app.core import logger  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+PATHS = {"health": "/health", "home": "/", "model_info": "/model/info"}
+
+
+async def call(path: str, headers: list) -> tuple[int, dict]:
+    """Uma requisicao GET direto no app ASGI. Retorna (status, headers)."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    response = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = dict(message.get("headers", []))
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"]
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, weight = part.split("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+async def run(args) -> dict:
+    token = create_token("admin", "admin")
+    auth = [(b"authorization", f"Bearer {token}".encode())]
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    plan = rng.choices(list(mix), weights=list(mix.values()), k=args.requests)
+
+    # ETag de cada rota (se a versao do app tiver)
+    etags = {}
+    for name, path in PATHS.items():
+        _, headers = await call(path, auth)
+        if b"etag" in headers:
+            etags[name] = headers[b"etag"]
+
+    results = {}
+    for conditional in (False, True):
+        statuses = {}
+        for _ in range(args.warmup):
+            await call("/health", [])
+        start = time.perf_counter()
+        for name in plan:
+            headers = list(auth) if name == "model_info" else []
+            if conditional and name in etags:
+                headers.append((b"if-none-match", etags[name]))
+            status, _ = await call(PATHS[name], headers)
+            statuses[status] = statuses.get(status, 0) + 1
+        elapsed = time.perf_counter() - start
+        results["if_none_match" if conditional else "plain"] = {
+            "req_per_s": round(args.requests / elapsed, 1),
+            "us_per_req": round(elapsed * 1e6 / args.requests, 1),
+            "statuses": statuses,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de trafego de monitoramento em /, /health e /model/info")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--mix", default="health=0.8,home=0.1,model_info=0.1",
+                        help="proporcao de cada rota (health, home, model_info)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Logs continuam sendo formatados (fazem parte do custo), mas vao para /dev/null
+    devnull = open(os.devnull, "w")
+    for handler in logger.handlers:
+        handler.setStream(devnull)
+
+    results = asyncio.run(run(args))
+    print(f"{'modo':<14} {'req/s':>10} {'us/req':>8}  status")
+    for mode, r in results.items():
+        print(f"{mode:<14} {r['req_per_s']:>10} {r['us_per_req']:>8}  {r['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark de inferencia paralela dentro de uma requisicao.
+
+Mede o speedup de predict_with_proba dividindo lotes grandes em partes
+paralelas, contra a execucao sequencial, para varios tamanhos de lote.
+
+Uso:
+    python scripts/bench_parallel_inference.py --max-parallel 4
+    MODEL_LOOKUP_TABLE=true python scripts/bench_parallel_inference.py
+
+Por padrao desliga a tabela de regioes para medir o proprio modelo.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("MODEL_LOOKUP_TABLE", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from app.cpus import available_cpus  # noqa: E402
+from app.model_loader import (  # noqa: E402
+    INFERENCE_CHUNK_ROWS,
+    MODELO_OK,
+    modelo,
+    predict_with_proba,
+)
+
+
+def best_time(features: np.ndarray, max_parallel: int, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_with_proba(features, max_parallel=max_parallel)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speedup da inferencia paralela por tamanho de lote")
+    parser.add_argument("--max-parallel", type=int, default=available_cpus())
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 5000, 20000, 100000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    if not MODELO_OK:
+        sys.exit("Modelo nao carregado")
+
+    rng = np.random.default_rng(0)
+    print(f"modelo={type(modelo).__name__} chunk_rows={INFERENCE_CHUNK_ROWS} "
+          f"max_parallel={args.max_parallel} cpus={available_cpus()}")
+    print(f"{'linhas':>8} {'sequencial_ms':>14} {'paralelo_ms':>12} {'speedup':>8}")
+    for rows in args.rows:
+        features = rng.uniform(0, 10, size=(rows, modelo.n_features_in_))
+        seq = best_time(features, 1, args.repeats)
+        par = best_time(features, args.max_parallel, args.repeats)
+        print(f"{rows:>8} {seq * 1000:>14.2f} {par * 1000:>12.2f} {seq / par:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
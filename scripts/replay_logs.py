@@ -0,0 +1,366 @@
+"""
+Replay de trafego de producao a partir dos logs estruturados.
+
+Benchmarks sinteticos nao reproduzem a mistura real de usuarios, tamanhos
+de lote e rajadas. Os logs JSON da API ja tem o necessario:
+- request_completed: timestamp, metodo, path, status, latencia, IP
+- prediction_completed / batch_prediction_completed: usuario, classe,
+  batch_size e unique_items (ligados ao request pelo trace_id)
+
+O script reconstroi o instante de chegada de cada requisicao
+(timestamp do log - latencia), comprime o tempo por --speed e dispara o
+mesmo cronograma contra uma instancia local (malha aberta: cada requisicao
+sai no seu horario, sem esperar as anteriores). As features sao
+sintetizadas: mesma especie prevista no log, mesmo tamanho de lote e
+mesma proporcao de itens repetidos.
+
+No final compara, por endpoint, a distribuicao de latencia e a taxa de
+erro do replay com as latencias originais do log.
+
+Uso:
+    python scripts/replay_logs.py logs/api.jsonl --target http://localhost:8000 --speed 10
+    docker logs api 2>&1 | python scripts/replay_logs.py - --speed 60 --limit 5000
+    python scripts/replay_logs.py logs/api.jsonl --in-process
+
+Saida: tabela por endpoint + relatorio JSON (--output).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+
+FEATURES = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+# Medias aproximadas de cada especie (mesma ordem de model_loader.classes)
+SPECIES_MEANS = {
+    "setosa": (5.0, 3.4, 1.5, 0.2),
+    "versicolor": (5.9, 2.8, 4.3, 1.3),
+    "virginica": (6.6, 3.0, 5.6, 2.0),
+}
+# Rotas que nao fazem sentido repetir (login eh feito antes do replay)
+SKIP_PREFIXES = ("/login", "/admin", "/metrics", "/docs", "/openapi.json")
+
+
+# =============================================================================
+# LEITURA DOS LOGS
+# =============================================================================
+def _parse_timestamp(value: str) -> float:
+    return datetime.fromisoformat(value.rstrip("Z")).timestamp()
+
+
+def read_records(paths: list) -> list:
+    """Le linhas JSON dos arquivos (ou stdin com '-'), ignorando o resto."""
+    records = []
+    for path in paths:
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        with stream:
+            for line in stream:
+                line = line.strip()
+                if not line.startswith("{"):
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def build_schedule(records: list) -> list:
+    """
+    Junta request_completed com o log de predicao do mesmo trace_id.
+
+    Returns:
+        Lista ordenada de eventos {"offset_s", "method", "path", "status",
+        "latency_ms", "client_ip", "user", "classe", "batch_size", "unique_items"}
+    """
+    predictions = {}
+    for rec in records:
+        if rec.get("message") in ("prediction_completed", "batch_prediction_completed"):
+            predictions[rec.get("trace_id")] = rec
+
+    events = []
+    for rec in records:
+        if rec.get("message") != "request_completed":
+            continue
+        path = rec.get("path", "")
+        if not path or path.startswith(SKIP_PREFIXES):
+            continue
+        try:
+            finished = _parse_timestamp(rec["timestamp"])
+            latency_ms = float(rec["latency_ms"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        pred = predictions.get(rec.get("trace_id"), {})
+        events.append(
+            {
+                "arrival": finished - latency_ms / 1000,
+                "method": rec.get("method", "GET"),
+                "path": path,
+                "status": rec.get("status_code"),
+                "latency_ms": latency_ms,
+                "client_ip": rec.get("client_ip"),
+                "user": pred.get("user"),
+                "classe": pred.get("classe"),
+                "batch_size": pred.get("batch_size"),
+                "unique_items": pred.get("unique_items"),
+            }
+        )
+
+    events.sort(key=lambda e: e["arrival"])
+    if events:
+        t0 = events[0]["arrival"]
+        for e in events:
+            e["offset_s"] = e.pop("arrival") - t0
+    return events
+
+
+# =============================================================================
+# SINTESE DE PAYLOADS
+# =============================================================================
+class PayloadFactory:
+    """Gera flores plausiveis reproduzindo especie, lote e repeticoes do log."""
+
+    def __init__(self, events: list, seed: int):
+        self.rng = random.Random(seed)
+        # Requisicoes rejeitadas (422/429) nao tem log de predicao:
+        # usa a distribuicao empirica de lotes do proprio log
+        self.batch_sizes = [e["batch_size"] for e in events if e["batch_size"]] or [10]
+
+    def flower(self, classe: str = None) -> dict:
+        means = SPECIES_MEANS.get(classe) or self.rng.choice(list(SPECIES_MEANS.values()))
+        values = [min(10.0, max(0.0, round(self.rng.gauss(m, 0.3), 1))) for m in means]
+        return dict(zip(FEATURES, values))
+
+    def single(self, event: dict) -> dict:
+        return self.flower(event["classe"])
+
+    def batch(self, event: dict) -> dict:
+        size = event["batch_size"] or self.rng.choice(self.batch_sizes)
+        unique = min(size, max(1, event["unique_items"] or size))
+        distinct = [self.flower() for _ in range(unique)]
+        items = distinct + [self.rng.choice(distinct) for _ in range(size - unique)]
+        self.rng.shuffle(items)
+        return {"items": items}
+
+
+# =============================================================================
+# REPLAY
+# =============================================================================
+class Replayer:
+    def __init__(self, client: httpx.AsyncClient, credentials: dict, factory: PayloadFactory, max_inflight: int):
+        self.client = client
+        self.credentials = credentials
+        self.factory = factory
+        self.semaphore = asyncio.Semaphore(max_inflight)
+        self.tokens = {}
+        self.results = []
+
+    async def login(self, username: str):
+        password = self.credentials[username]
+        resp = await self.client.post("/login", json={"username": username, "password": password})
+        resp.raise_for_status()
+        self.tokens[username] = resp.json()["access_token"]
+
+    def _user(self, event: dict) -> str:
+        # Usuario do log se houver credencial; senao o primeiro configurado
+        if event["user"] in self.credentials:
+            return event["user"]
+        return next(iter(self.credentials))
+
+    async def _send(self, event: dict, username: str) -> httpx.Response:
+        headers = {"Authorization": f"Bearer {self.tokens.get(username, '')}"}
+        if event["client_ip"]:
+            headers["X-Forwarded-For"] = event["client_ip"]
+
+        if event["path"] == "/predict":
+            return await self.client.post("/predict", json=self.factory.single(event), headers=headers)
+        if event["path"] == "/predict/batch":
+            return await self.client.post("/predict/batch", json=self.factory.batch(event), headers=headers)
+        return await self.client.request(event["method"], event["path"], headers=headers)
+
+    async def fire(self, event: dict, scheduled: float):
+        async with self.semaphore:
+            result = {
+                "endpoint": f"{event['method']} {event['path']}",
+                "logged_status": event["status"],
+                "logged_ms": event["latency_ms"],
+                "dispatch_lag_ms": (time.monotonic() - scheduled) * 1000,
+            }
+            username = self._user(event)
+            start = time.perf_counter()
+            try:
+                resp = await self._send(event, username)
+                if resp.status_code == 401:
+                    # Token expirou durante o replay: renova e tenta de novo
+                    await self.login(username)
+                    start = time.perf_counter()
+                    resp = await self._send(event, username)
+                result["client_ms"] = (time.perf_counter() - start) * 1000
+                result["status"] = resp.status_code
+                server_ms = resp.headers.get("X-Response-Time-Ms")
+                result["server_ms"] = float(server_ms) if server_ms else None
+            except httpx.HTTPError as exc:
+                result["client_ms"] = (time.perf_counter() - start) * 1000
+                result["status"] = None
+                result["server_ms"] = None
+                result["error"] = type(exc).__name__
+            self.results.append(result)
+
+    async def run(self, events: list, speed: float):
+        for username in self.credentials:
+            await self.login(username)
+
+        start = time.monotonic()
+        tasks = []
+        for event in events:
+            scheduled = start + event["offset_s"] / speed
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self.fire(event, scheduled)))
+        await asyncio.gather(*tasks)
+        return time.monotonic() - start
+
+
+# =============================================================================
+# RELATORIO
+# =============================================================================
+def percentiles(values: list) -> dict:
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return {}
+
+    def rank(q):
+        return round(values[min(len(values) - 1, int(q * len(values)))], 2)
+
+    return {"p50": rank(0.50), "p90": rank(0.90), "p99": rank(0.99), "max": round(values[-1], 2)}
+
+
+def _is_error(status) -> bool:
+    return status is None or status >= 500
+
+
+def summarize(results: list) -> dict:
+    by_endpoint = {}
+    for r in results:
+        by_endpoint.setdefault(r["endpoint"], []).append(r)
+
+    report = {}
+    for endpoint, rs in sorted(by_endpoint.items(), key=lambda kv: -len(kv[1])):
+        n = len(rs)
+        report[endpoint] = {
+            "requests": n,
+            "error_rate": round(sum(_is_error(r["status"]) for r in rs) / n, 4),
+            "logged_error_rate": round(sum(_is_error(r["logged_status"]) for r in rs) / n, 4),
+            "status_mismatch": sum(r["status"] != r["logged_status"] for r in rs),
+            "replay_ms": percentiles([r["server_ms"] for r in rs]),
+            "replay_client_ms": percentiles([r["client_ms"] for r in rs]),
+            "logged_ms": percentiles([r["logged_ms"] for r in rs]),
+        }
+    return report
+
+
+def print_table(report: dict):
+    print(f"{'endpoint':<24} {'n':>6} {'err%':>6} {'log_err%':>8} "
+          f"{'p50':>8} {'log_p50':>8} {'p99':>8} {'log_p99':>8} {'p99_delta':>9}")
+    for endpoint, s in report.items():
+        rep, log = s["replay_ms"], s["logged_ms"]
+        delta = (
+            f"{(rep['p99'] / log['p99'] - 1) * 100:+.0f}%"
+            if rep and log and log["p99"] else "-"
+        )
+        print(
+            f"{endpoint:<24} {s['requests']:>6} {s['error_rate'] * 100:>6.2f} "
+            f"{s['logged_error_rate'] * 100:>8.2f} {rep.get('p50', '-'):>8} {log.get('p50', '-'):>8} "
+            f"{rep.get('p99', '-'):>8} {log.get('p99', '-'):>8} {delta:>9}"
+        )
+
+
+def parse_credentials(values: list) -> dict:
+    if not values:
+        values = [
+            f"admin:{os.getenv('ADMIN_PASSWORD', 'admin123')}",
+            f"user:{os.getenv('USER_PASSWORD', 'user123')}",
+        ]
+    return dict(v.split(":", 1) for v in values)
+
+
+async def replay(args, events: list) -> dict:
+    if args.in_process:
+        from app.core import logger
+        from app.main import app
+
+        # Logs da app no mesmo processo iriam se misturar ao relatorio
+        devnull = open(os.devnull, "w")
+        for handler in logger.handlers:
+            handler.setStream(devnull)
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://replay"
+    else:
+        transport = httpx.AsyncHTTPTransport()
+        base_url = args.target
+
+    async def _run(client):
+        replayer = Replayer(client, parse_credentials(args.credentials), PayloadFactory(events, args.seed), args.max_inflight)
+        elapsed = await replayer.run(events, args.speed)
+        return replayer.results, elapsed
+
+    limits = httpx.Limits(max_connections=args.max_inflight)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        if args.in_process:
+            async with app.router.lifespan_context(app):
+                results, elapsed = await _run(client)
+        else:
+            results, elapsed = await _run(client)
+
+    logged_span = events[-1]["offset_s"] if events else 0.0
+    return {
+        "requests": len(results),
+        "speed": args.speed,
+        "logged_duration_s": round(logged_span, 1),
+        "replay_duration_s": round(elapsed, 1),
+        "dispatch_lag_ms": percentiles([r["dispatch_lag_ms"] for r in results]),
+        "transport_errors": sum(1 for r in results if "error" in r),
+        "endpoints": summarize(results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay de trafego de producao a partir dos logs JSON")
+    parser.add_argument("logs", nargs="+", help="arquivos de log JSON lines ('-' = stdin)")
+    parser.add_argument("--target", default="http://localhost:8000", help="URL da instancia local")
+    parser.add_argument("--in-process", action="store_true", help="usa app.main:app via ASGI, sem rede")
+    parser.add_argument("--speed", type=float, default=1.0, help="fator de compressao do tempo (10 = 10x mais rapido)")
+    parser.add_argument("--limit", type=int, default=0, help="replay apenas das N primeiras requisicoes")
+    parser.add_argument("--max-inflight", type=int, default=256, help="requisicoes simultaneas maximas")
+    parser.add_argument("--timeout", type=float, default=30, help="timeout por requisicao (s)")
+    parser.add_argument("--credentials", action="append", metavar="USER:SENHA",
+                        help="credenciais para login (repetivel; padrao: admin e user)")
+    parser.add_argument("--output", help="grava o relatorio JSON neste arquivo")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    events = build_schedule(read_records(args.logs))
+    if args.limit:
+        events = events[:args.limit]
+    if not events:
+        sys.exit("Nenhum request_completed encontrado nos logs")
+
+    report = asyncio.run(replay(args, events))
+    print_table(report["endpoints"])
+    print(json.dumps({k: v for k, v in report.items() if k != "endpoints"}))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Soak test com deteccao de vazamento de memoria.
+
+Replica trafego realista e de alta cardinalidade contra app.main:app
+(no mesmo processo, via ASGI) por horas, amostrando RSS e snapshots do
+tracemalloc em intervalos. Estruturas que crescem com o trafego e nunca
+sao limitadas aparecem aqui:
+- storage memory:// do slowapi (uma chave por IP de cliente)
+- filhos das metricas Prometheus (user / client_ip / batch_size)
+- dicionarios `extra` dos logs
+
+Ao final, lista os locais de alocacao que mais cresceram desde o fim do
+aquecimento e falha (exit 1) se o crescimento passar do orcamento.
+
+Uso:
+    python scripts/soak_test.py --duration 7200 --interval 60 --budget-mb 50
+
+Saida: uma linha JSON por amostra + relatorio final.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+from app.core import logger  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+# Medias aproximadas de cada especie (para gerar flores plausiveis)
+SPECIES_MEANS = [
+    (5.0, 3.4, 1.5, 0.2),
+    (5.9, 2.8, 4.3, 1.3),
+    (6.6, 3.0, 5.6, 2.0),
+]
+USERS = [("admin", os.getenv("ADMIN_PASSWORD", "admin123")), ("user", os.getenv("USER_PASSWORD", "user123"))]
+
+
+def rss_mb() -> float:
+    """RSS atual em MB (Linux: /proc; outros: pico via getrusage)."""
+    statm = Path("/proc/self/statm")
+    if statm.exists():
+        pages = int(statm.read_text().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def random_flower(rng: random.Random) -> dict:
+    means = rng.choice(SPECIES_MEANS)
+    values = [min(10.0, max(0.0, round(rng.gauss(m, 0.3), 1))) for m in means]
+    return dict(zip(["sepal_length", "sepal_width", "petal_length", "petal_width"], values))
+
+
+class TrafficGenerator:
+    """Mistura de endpoints, usuarios, IPs e tamanhos de lote."""
+
+    def __init__(self, client: httpx.AsyncClient, ip_pool: int, seed: int):
+        self.client = client
+        self.ip_pool = ip_pool
+        self.rng = random.Random(seed)
+        self.tokens = {}
+        self.stats = {"requests": 0, "errors": 0}
+        self.status_counts = {}
+
+    def _ip(self) -> str:
+        # 5% do trafego vem de poucos IPs "quentes" (exercita o 429)
+        if self.rng.random() < 0.05:
+            return f"10.0.0.{self.rng.randint(1, 5)}"
+        n = self.rng.randrange(self.ip_pool)
+        return f"172.{16 + (n >> 16) % 16}.{(n >> 8) & 255}.{n & 255}"
+
+    async def login(self, username: str, password: str):
+        resp = await self.client.post(
+            "/login",
+            json={"username": username, "password": password},
+            headers={"X-Forwarded-For": self._ip()},
+        )
+        if resp.status_code == 200:
+            self.tokens[username] = resp.json()["access_token"]
+
+    async def one_request(self):
+        username, password = self.rng.choice(USERS)
+        if username not in self.tokens:
+            await self.login(username, password)
+        headers = {
+            "Authorization": f"Bearer {self.tokens.get(username, '')}",
+            "X-Forwarded-For": self._ip(),
+        }
+
+        roll = self.rng.random()
+        if roll < 0.60:
+            resp = await self.client.post("/predict", json=random_flower(self.rng), headers=headers)
+        elif roll < 0.80:
+            # Tamanhos de lote com cauda longa (muitos pequenos, alguns de 100)
+            size = min(100, max(1, int(self.rng.paretovariate(1.2))))
+            items = [random_flower(self.rng) for _ in range(size)]
+            resp = await self.client.post("/predict/batch", json={"items": items}, headers=headers)
+        elif roll < 0.90:
+            resp = await self.client.get("/health", headers=headers)
+        elif roll < 0.95:
+            resp = await self.client.get("/model/info", headers=headers)
+        else:
+            resp = await self.client.get("/ready", headers=headers)
+
+        if resp.status_code == 401:
+            self.tokens.pop(username, None)  # token expirou: refaz login
+        self.stats["requests"] += 1
+        if resp.status_code >= 500:
+            self.stats["errors"] += 1
+        self.status_counts[resp.status_code] = self.status_counts.get(resp.status_code, 0) + 1
+
+
+def top_growth(baseline, snapshot, limit: int) -> list:
+    stats = snapshot.compare_to(baseline, "lineno")
+    growing = [s for s in stats if s.size_diff > 0][:limit]
+    return [
+        {
+            "site": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+            "growth_kb": round(s.size_diff / 1024, 1),
+            "count_diff": s.count_diff,
+        }
+        for s in growing
+    ]
+
+
+def slope_mb_per_hour(samples: list) -> float:
+    """Inclinacao (minimos quadrados) do RSS apos o aquecimento."""
+    if len(samples) < 2:
+        return 0.0
+    xs = [s["elapsed_s"] for s in samples]
+    ys = [s["rss_mb"] for s in samples]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    den = sum((x - mx) ** 2 for x in xs) or 1.0
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / den * 3600
+
+
+async def soak(args) -> int:
+    tracemalloc.start(args.frames)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://soak") as client:
+            traffic = TrafficGenerator(client, args.ip_pool, args.seed)
+            start = time.monotonic()
+            deadline = start + args.duration
+
+            async def worker():
+                while time.monotonic() < deadline:
+                    await traffic.one_request()
+
+            workers = [asyncio.create_task(worker()) for _ in range(args.concurrency)]
+
+            baseline = None
+            baseline_rss = None
+            samples = []
+            while time.monotonic() < deadline:
+                await asyncio.sleep(min(args.interval, max(0.0, deadline - time.monotonic())))
+                gc.collect()
+                elapsed = time.monotonic() - start
+                current, _ = tracemalloc.get_traced_memory()
+                sample = {
+                    "elapsed_s": round(elapsed, 1),
+                    "rss_mb": round(rss_mb(), 2),
+                    "traced_mb": round(current / 1024 / 1024, 2),
+                    **traffic.stats,
+                }
+                print(json.dumps(sample), flush=True)
+
+                if baseline is None and elapsed >= args.warmup:
+                    baseline = tracemalloc.take_snapshot()
+                    baseline_rss = sample["rss_mb"]
+                if baseline is not None:
+                    samples.append(sample)
+
+            await asyncio.gather(*workers)
+
+    if baseline is None:
+        print(json.dumps({"error": "duration shorter than warmup; no baseline taken"}))
+        return 2
+
+    gc.collect()
+    final = tracemalloc.take_snapshot()
+    final_rss = rss_mb()
+    growth = final_rss - baseline_rss
+    report = {
+        "requests": traffic.stats["requests"],
+        "errors": traffic.stats["errors"],
+        "status_counts": traffic.status_counts,
+        "baseline_rss_mb": baseline_rss,
+        "final_rss_mb": round(final_rss, 2),
+        "rss_growth_mb": round(growth, 2),
+        "rss_slope_mb_per_hour": round(slope_mb_per_hour(samples), 2),
+        "budget_mb": args.budget_mb,
+        "top_growth": top_growth(baseline, final, args.top),
+        "passed": growth <= args.budget_mb,
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if report["passed"] else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test com deteccao de vazamento de memoria")
+    parser.add_argument("--duration", type=float, default=7200, help="duracao total (s)")
+    parser.add_argument("--interval", type=float, default=60, help="intervalo entre amostras (s)")
+    parser.add_argument("--warmup", type=float, default=300, help="aquecimento antes da baseline (s)")
+    parser.add_argument("--concurrency", type=int, default=16, help="requisicoes simultaneas")
+    parser.add_argument("--ip-pool", type=int, default=100_000, help="IPs de cliente distintos")
+    parser.add_argument("--budget-mb", type=float, default=50, help="crescimento maximo de RSS (MB)")
+    parser.add_argument("--top", type=int, default=15, help="locais de alocacao no relatorio")
+    parser.add_argument("--frames", type=int, default=1, help="frames por alocacao no tracemalloc")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Logs continuam sendo formatados (o `extra` entra no teste), mas vao para /dev/null
+    devnull = open(os.devnull, "w")
+    for handler in logger.handlers:
+        handler.setStream(devnull)
+
+    sys.exit(asyncio.run(soak(args)))
+
+
+if __name__ == "__main__":
+    main()
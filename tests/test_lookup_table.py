@@ -0,0 +1,87 @@
+"""
+Equivalencia da tabela de regioes de decisao contra predict_proba.
+
+A verificacao no load (DecisionLookupTable.verify) so desliga a tabela em
+producao; aqui uma regressao (ex: em _cell_representatives) falha o teste.
+"""
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from app.lookup_table import FEATURE_MAX, FEATURE_MIN, DecisionLookupTable
+
+
+MODEL_PATH = Path(__file__).resolve().parent.parent / "app" / "models" / "modelo_iris.pkl"
+MAX_BYTES = 64 * 1024 * 1024
+
+
+def _float32_neighbours(t: np.ndarray) -> np.ndarray:
+    """O limiar, o float32 mais proximo e os float32 logo acima/abaixo dele."""
+    t32 = t.astype(np.float32)
+    return np.concatenate(
+        [
+            t,
+            t32,
+            np.nextafter(t32, np.float32(-np.inf)),
+            np.nextafter(t32, np.float32(np.inf)),
+            np.nextafter(t, -np.inf),
+            np.nextafter(t, np.inf),
+        ]
+    ).astype(np.float64)
+
+
+def probe_points(table: DecisionLookupTable, n_random: int = 20000, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n_features = len(table.thresholds)
+    points = [rng.uniform(FEATURE_MIN, FEATURE_MAX, size=(n_random, n_features))]
+    for f, t in enumerate(table.thresholds):
+        values = np.concatenate([_float32_neighbours(t), [FEATURE_MIN, FEATURE_MAX]])
+        # Cada valor de borda numa linha aleatoria nas demais features
+        edges = rng.uniform(FEATURE_MIN, FEATURE_MAX, size=(len(values), n_features))
+        edges[:, f] = values
+        points.append(edges)
+    return np.clip(np.vstack(points), FEATURE_MIN, FEATURE_MAX)
+
+
+def assert_equivalent(modelo):
+    table = DecisionLookupTable.build(modelo, max_bytes=MAX_BYTES)
+    assert table is not None
+    points = probe_points(table)
+    assert np.array_equal(table.predict_proba(points), modelo.predict_proba(points))
+
+
+@pytest.mark.skipif(not MODEL_PATH.exists(), reason="modelo treinado nao encontrado")
+def test_shipped_model_matches_predict_proba():
+    with open(MODEL_PATH, "rb") as f:
+        modelo = pickle.load(f)
+    assert_equivalent(modelo)
+
+
+def _synthetic_data(seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(FEATURE_MIN, FEATURE_MAX, size=(300, 4))
+    y = (X[:, 0] + 2 * X[:, 2] > 15).astype(int) + (X[:, 3] > 6).astype(int)
+    return X, y
+
+
+def test_synthetic_forest_matches_predict_proba():
+    X, y = _synthetic_data()
+    modelo = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(X, y)
+    assert_equivalent(modelo)
+
+
+def test_single_tree_matches_predict_proba():
+    X, y = _synthetic_data(seed=1)
+    modelo = DecisionTreeClassifier(max_depth=5, random_state=0).fit(X, y)
+    assert_equivalent(modelo)
+
+
+def test_non_tree_model_is_skipped():
+    from sklearn.linear_model import LogisticRegression
+
+    X, y = _synthetic_data()
+    assert DecisionLookupTable.build(LogisticRegression().fit(X, y), max_bytes=MAX_BYTES) is None
@@ -0,0 +1,121 @@
+"""
+Fila justa (WFQ) de inferencia: ordem, cancelamento e pesos.
+"""
+import asyncio
+import math
+
+import pytest
+
+from app.scheduler import FairScheduler, _parse_weights
+
+
+WEIGHTS = {"admin": 4.0, "user": 1.0}
+
+
+def _user(name: str, role: str = "user") -> dict:
+    return {"username": name, "role": role}
+
+
+async def _hold(scheduler: FairScheduler, user: dict, release: asyncio.Event):
+    async with scheduler.slot(user, cost=1):
+        await release.wait()
+
+
+def test_one_slot_serves_by_weighted_finish_tag():
+    async def scenario():
+        scheduler = FairScheduler(1, WEIGHTS)
+        order = []
+
+        async def request(user: dict):
+            async with scheduler.slot(user, cost=1):
+                order.append(user["username"])
+
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, _user("holder"), release))
+        await asyncio.sleep(0)
+
+        # "user" enfileira primeiro, mas admin (peso 4) tem termino virtual menor
+        waiters = [asyncio.create_task(request(_user("u"))) for _ in range(3)]
+        waiters += [asyncio.create_task(request(_user("a", "admin"))) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 6
+
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return order
+
+    assert asyncio.run(scenario()) == ["a", "a", "a", "u", "u", "u"]
+
+
+def test_virtual_time_never_moves_backwards():
+    async def scenario():
+        scheduler = FairScheduler(1, WEIGHTS)
+        seen = []
+
+        async def request(user: dict, cost: int):
+            async with scheduler.slot(user, cost=cost):
+                seen.append(scheduler._virtual_time)
+
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, _user("holder"), release))
+        await asyncio.sleep(0)
+
+        # Pedido caro com inicio 0 sai depois de varios baratos de outro usuario
+        waiters = [asyncio.create_task(request(_user("big"), 10))]
+        waiters += [asyncio.create_task(request(_user("small"), 1)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return seen
+
+    seen = asyncio.run(scenario())
+    assert seen == sorted(seen)
+    assert seen[-1] >= 4  # inicio do ultimo pedido barato
+
+
+def test_cancelled_waiters_leave_queue_and_do_not_leak_slot():
+    async def scenario():
+        scheduler = FairScheduler(1, WEIGHTS)
+        served = []
+
+        async def request(name: str):
+            async with scheduler.slot(_user(name), cost=1):
+                served.append(name)
+
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, _user("holder"), release))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(request(f"w{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 3
+
+        # Clientes desconectam ainda na fila
+        waiters[0].cancel()
+        waiters[1].cancel()
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 1
+
+        release.set()
+        await holder
+        await waiters[2]
+        assert served == ["w2"]
+        assert scheduler.queue_depth == 0
+        assert scheduler._available == 1
+
+        # Slot livre: o proximo pedido entra sem esperar
+        await asyncio.wait_for(request("next"), timeout=1)
+        return served
+
+    assert asyncio.run(scenario()) == ["w2", "next"]
+
+
+@pytest.mark.parametrize("value", ["admin=0", "user=-1", "admin=4,user=0", "user=nan", "user=inf"])
+def test_non_positive_or_non_finite_weights_are_rejected(value):
+    with pytest.raises(ValueError):
+        _parse_weights(value)
+
+
+def test_weights_are_parsed():
+    weights = _parse_weights(" admin=4, user=0.5,")
+    assert weights == {"admin": 4.0, "user": 0.5}
+    assert all(math.isfinite(w) for w in weights.values())